@@ -0,0 +1,78 @@
+"""快速图形构建路径与常规plotly路径的性能对比
+
+用法: python benchmarks/bench_fast_figure.py [--frames 1000 10000] [--workers N] [--skip-slow]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.geojson_processor import load_geojson, create_district_adcode_map, build_topology
+from src.visualization import create_wind_visualization, write_html_with_topology
+from src.fast_figure import write_fast_html, orjson
+import config.settings as config
+
+def make_synthetic_data(geojson, n_frames, seed=0):
+    """为GeoJSON中的所有区域生成逐时合成风速数据"""
+    rng = np.random.default_rng(seed)
+    district_adcode_map = create_district_adcode_map(geojson)
+    times = pd.date_range("2025-01-01", periods=n_frames, freq="h")
+
+    frames = []
+    for district, adcode in district_adcode_map.items():
+        frames.append(pd.DataFrame({
+            'datetime': times,
+            'district': district,
+            'adcode': adcode,
+            'wind_speed': np.abs(rng.normal(3, 1.5, n_frames))
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def run_slow(df, geojson, topology, file_path):
+    fig = create_wind_visualization(df, geojson, config, topology=topology)
+    write_html_with_topology(fig, file_path, topology)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fast figure building")
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--skip-slow", action="store_true", help="只运行快速路径")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    geojson = load_geojson(config.GEOJSON_PATH)
+    topology = build_topology(geojson, config.VISUALIZATION_SETTINGS["topology_quantization"])
+
+    print(f"orjson: {'yes' if orjson is not None else 'no'}, workers: {args.workers or os.cpu_count()}")
+    print(f"{'frames':>8} {'plotly (s)':>12} {'fast (s)':>10} {'speedup':>9} {'size (MB)':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_frames in args.frames:
+            df = make_synthetic_data(geojson, n_frames)
+            fast_path = os.path.join(tmp, f"fast_{n_frames}.html")
+            fast = timed(write_fast_html, df, geojson, config, fast_path, topology=topology, workers=args.workers)
+            size = os.path.getsize(fast_path) / (1024 * 1024)
+
+            if args.skip_slow:
+                print(f"{n_frames:>8} {'-':>12} {fast:>10.2f} {'-':>9} {size:>10.1f}")
+                continue
+
+            slow = timed(run_slow, df, geojson, topology, os.path.join(tmp, f"slow_{n_frames}.html"))
+            print(f"{n_frames:>8} {slow:>12.2f} {fast:>10.2f} {slow / fast:>8.1f}x {size:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""按时间范围加载与全量加载的性能对比
+
+在临时目录中生成与data/csv相同格式的逐时CSV归档，比较全量加载和加载2天窗口的耗时。
+用法: python benchmarks/bench_time_range.py [--years 1 5] [--window-hours 48]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_archive import write_archive
+from src.data_loader import load_wind_data
+from src.geojson_processor import load_geojson
+import config.settings as config
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time-range pushdown")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--window-hours", type=int, default=48)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    geojson = load_geojson(config.GEOJSON_PATH)
+    districts = list(config.DISTRICT_FILES)
+
+    print(f"{'years':>6} {'rows':>9} {'full (s)':>10} {'window@start':>13} {'window@mid':>11} {'window@end':>11}")
+
+    for years in args.years:
+        times = pd.date_range("2020-01-01", periods=years * 365 * 24, freq="h")
+        with tempfile.TemporaryDirectory() as tmp:
+            district_files = write_archive(tmp, districts, times)
+            full_time, full_df = timed(load_wind_data, district_files, geojson, config)
+
+            window_times = []
+            for anchor in (0, len(times) // 2, len(times) - args.window_hours):
+                start = times[anchor]
+                end = start + pd.Timedelta(hours=args.window_hours - 1)
+                elapsed, window_df = timed(load_wind_data, district_files, geojson, config, start=start, end=end)
+                assert len(window_df) == args.window_hours * len(districts)
+                window_times.append(elapsed)
+
+            print(f"{years:>6} {len(full_df):>9} {full_time:>10.3f} "
+                  f"{window_times[0]:>13.3f} {window_times[1]:>11.3f} {window_times[2]:>11.3f}")
+
+if __name__ == "__main__":
+    main()
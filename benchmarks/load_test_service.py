@@ -0,0 +1,175 @@
+"""地图服务的本地压力测试
+
+在本进程中启动地图服务（或通过--url连接已运行的服务），用多个并发客户端按偏斜分布请求一组参数组合，
+统计延迟的p50/p99和缓存命中率。部分请求携带If-None-Match以测试条件请求。
+客户端使用持久连接；测试期间另外保持--idle个空闲的持久连接，并确认这些连接不会阻塞其他请求。
+用法: python benchmarks/load_test_service.py [--requests 2000] [--clients 16] [--revalidate 0.3] [--idle 32]
+"""
+import os
+import sys
+import time
+import json
+import random
+import logging
+import argparse
+import threading
+import itertools
+import http.client
+from urllib.parse import urlencode, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.map_service import MapService, MapServer, MAP_STYLES
+import config.settings as config
+
+def make_queries(service, count, seed=0):
+    """生成一组不同的请求参数组合"""
+    rng = random.Random(seed)
+    times = service.wind_df['datetime'].drop_duplicates().sort_values().tolist()
+    districts = list(service.district_adcode_map)
+    regions = ["all"] + [",".join(sorted(rng.sample(districts, k))) for k in (1, 3, 5, 8)]
+    windows = [(None, None)] + [
+        (times[i].isoformat(), times[min(i + 23, len(times) - 1)].isoformat())
+        for i in range(0, len(times), 24)
+    ]
+    resolutions = [None, "3h", "6h"]
+
+    combos = list(itertools.product(regions, windows, resolutions, MAP_STYLES))
+    rng.shuffle(combos)
+    queries = []
+    for region, (start, end), resolution, style in combos[:count]:
+        params = {"region": region, "style": style}
+        if start:
+            params.update(start=start, end=end)
+        if resolution:
+            params["resolution"] = resolution
+        queries.append(urlencode(params))
+    return queries
+
+class Client:
+    """复用一个持久连接发送请求，服务器关闭空闲连接后自动重连"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.connection = None
+
+    def request(self, path, headers=None):
+        """发送请求，返回 (响应, 响应体)"""
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request("GET", path, headers=headers or {})
+                response = self.connection.getresponse()
+                return response, response.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    def fetch(self, path, etag=None):
+        """发送请求，返回 (延迟秒数, 状态码, X-Cache, ETag)"""
+        start = time.perf_counter()
+        response, _ = self.request(path, {"If-None-Match": etag} if etag else None)
+        return time.perf_counter() - start, response.status, response.getheader("X-Cache"), response.getheader("ETag")
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the map service")
+    parser.add_argument("--url", help="已运行服务的地址，如 http://127.0.0.1:8050；不指定时在本进程中启动服务")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--workers", type=int, default=config.SERVICE_SETTINGS["workers"], help="构建图形的线程数")
+    parser.add_argument("--idle", type=int, default=32, help="测试期间保持的空闲持久连接数")
+    parser.add_argument("--queries", type=int, default=40, help="不同参数组合的数量")
+    parser.add_argument("--skew", type=float, default=1.2, help="请求分布的Zipf指数，越大越集中于热门组合")
+    parser.add_argument("--revalidate", type=float, default=0.3, help="携带If-None-Match的请求比例")
+    parser.add_argument("--cache-mb", type=float, default=config.SERVICE_SETTINGS["cache_max_bytes"] / (1024 * 1024))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server = None
+    service = MapService(config, cache_max_bytes=int(args.cache_mb * 1024 * 1024), workers=args.workers)
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        server = MapServer(("127.0.0.1", 0), service, config.SERVICE_SETTINGS["keepalive_timeout"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+
+    # 空闲的持久连接：各发送一个请求后保持打开，不再发送请求
+    idle_clients = [Client(host, port) for _ in range(args.idle)]
+    for client in idle_clients:
+        client.fetch("/stats")
+    probe = Client(host, port)
+    probe_latency = probe.fetch("/stats")[0]
+    probe.close()
+
+    queries = make_queries(service, args.queries)
+    rng = np.random.default_rng(0)
+    weights = 1.0 / np.arange(1, len(queries) + 1) ** args.skew
+    picks = rng.choice(len(queries), size=args.requests, p=weights / weights.sum())
+    revalidate = rng.random(args.requests) < args.revalidate
+
+    etags = {}
+    etags_lock = threading.Lock()
+    local = threading.local()
+
+    def run(i):
+        query = queries[picks[i]]
+        with etags_lock:
+            etag = etags.get(query) if revalidate[i] else None
+        if not hasattr(local, "client"):
+            local.client = Client(host, port)
+        result = local.client.fetch(f"/figure?{query}", etag)
+        if result[3]:
+            with etags_lock:
+                etags[query] = result[3]
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        results = list(executor.map(run, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    statuses = [r[1] for r in results]
+    cache = [r[2] for r in results]
+    hits = np.array([c == "HIT" for c in cache])
+
+    print(f"requests: {args.requests}, clients: {args.clients}, distinct queries: {len(queries)}")
+    print(f"idle keep-alive connections: {args.idle}, /stats latency with them open: {probe_latency * 1000:.1f} ms")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s ({elapsed:.2f}s)")
+    print(f"status: " + ", ".join(f"{code}={statuses.count(code)}" for code in sorted(set(statuses))))
+    print(f"cache hit rate: {hits.mean():.1%}")
+    print(f"{'':>8} {'count':>7} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for label, mask in (("all", np.ones(len(results), bool)), ("hit", hits), ("miss", ~hits)):
+        if mask.any():
+            p50, p99 = np.percentile(latencies[mask], [50, 99])
+            print(f"{label:>8} {mask.sum():>7} {p50:>10.1f} {p99:>10.1f}")
+
+    stats_client = Client(host, port)
+    _, body = stats_client.request("/stats")
+    print("server stats:", json.dumps(json.loads(body), ensure_ascii=False))
+    stats_client.close()
+
+    for client in idle_clients:
+        client.close()
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""生成与data/csv相同格式的合成逐时CSV归档（供性能测试和单元测试使用）"""
+import os
+
+import numpy as np
+
+CSV_PREAMBLE = [
+    "国家,中华人民共和国,",
+    "省/直辖市,北京市,",
+    "市,北京市,",
+    "县/区,{district}区,",
+    "开始时间,{start},",
+    "结束时间,{end},",
+    "时区,GMT+08:00,",
+    "数据源,合成数据,",
+    ",,",
+    "日期,时间,地面风速m/s",
+]
+
+def write_archive(directory, districts, times, seed=0):
+    """为每个区域写出一个CSV文件，数据行的顺序与times相同，返回 {区名: 文件路径}"""
+    rng = np.random.default_rng(seed)
+    dates = times.strftime('%Y-%m-%d')
+    clock = times.strftime('%H:%M:%S')
+    district_files = {}
+
+    for district in districts:
+        file_path = os.path.join(directory, f"{district}区.csv")
+        preamble = "\n".join(CSV_PREAMBLE).format(district=district, start=times.min(), end=times.max())
+        speeds = np.round(np.abs(rng.normal(3, 1.5, len(times))), 2)
+        rows = "\n".join(f"{d},{t},{v}" for d, t, v in zip(dates, clock, speeds))
+        with open(file_path, 'w', encoding='gbk') as f:
+            f.write(preamble + "\n" + rows + "\n")
+        district_files[district] = file_path
+
+    return district_files
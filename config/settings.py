@@ -49,7 +49,38 @@ VISUALIZATION_SETTINGS = {
     "line_color": "rgba(255, 255, 255, 0.8)",
     "text_font_size": 12,
     "text_font_color": "black",
-    "text_font_family": "Arial"
+    "text_font_family": "Arial",
+    "topology_quantization": 1e6,  # 拓扑编码的量化网格大小
+    "embed_topology": True         # 输出HTML时以共享弧段拓扑嵌入边界数据
+}
+
+# 性能设置
+PERFORMANCE_SETTINGS = {
+    "fast_figure": True,  # 以普通字典构建图形并直接序列化（安装orjson时更快），跳过plotly逐对象校验
+    "workers": None       # 序列化动画帧的进程数，None表示使用全部CPU核心
+}
+
+# 地图服务设置
+SERVICE_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 8050,
+    "workers": 8,                         # 构建图形的线程数（连接由独立线程处理）
+    "cache_max_bytes": 256 * 1024 * 1024,  # 响应缓存的最大字节数
+    "reload_check_interval": 5.0,          # 检查数据文件是否变化的间隔（秒）
+    "keepalive_timeout": 15.0              # 空闲的持久连接保持的时间（秒）
+}
+
+# 告警设置
+# statistic: value（原始风速）、mean或max（window_hours小时内的滚动统计）
+# 条件（operator threshold）连续成立duration_hours小时后进入告警状态
+ALERT_SETTINGS = {
+    "enabled": True,
+    "rules": [
+        {"name": "持续大风", "statistic": "value", "operator": ">", "threshold": 8.0, "duration_hours": 3},
+        {"name": "6小时平均风速偏高", "statistic": "mean", "window_hours": 6, "operator": ">", "threshold": 9.0}
+    ],
+    "marker_color": "rgba(255, 0, 0, 0.45)",  # 告警区域中心的标记颜色
+    "marker_size": 36
 }
 
 # 数据处理设置
@@ -59,5 +90,10 @@ DATA_PROCESSING_SETTINGS = {
     "date_format": "%Y-%m-%d",
     "time_format": "%H:%M",
     "datetime_format": "%Y-%m-%d %H:%M",
+    "csv_sorted_by_time": True,  # 数据行按时间升序排列，按时间范围加载时可二分定位并提前停止读取
+    "regularize_time_axis": True,  # 加载后将所有区域对齐到同一个等间隔时间轴
+    "time_frequency": "h",         # 时间轴间隔
+    "gap_fill": "linear",          # 缺测填补策略：none（不填补）、linear（线性插值）、ffill（前向填充）
+    "max_gap_steps": 3,            # 最多填补的连续缺测步数，None表示不限制
     "possible_wind_columns": ['地面风速m/s', '地面风速(m/s)', '风速', '地面风速', '10米风速']
 }
\ No newline at end of file
@@ -2,18 +2,43 @@
 import os
 import sys
 import logging
+import argparse
+import webbrowser
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.data_loader import load_wind_data
-from src.geojson_processor import load_geojson, create_district_adcode_map
-from src.visualization import create_wind_visualization
+from src.data_loader import load_wind_data, parse_time_bound
+from src.geojson_processor import load_geojson, create_district_adcode_map, build_topology
+from src.visualization import create_wind_visualization, write_html_with_topology
+from src.fast_figure import write_fast_html
 from src.utils import setup_logging
 import config.settings as config
 
+def time_bound(end_of_day=False):
+    """命令行时间参数的类型转换，无法解析时由argparse报告错误"""
+    def parse(value):
+        try:
+            return parse_time_bound(value, end_of_day)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无法解析的时间: {value}")
+    return parse
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="Beijing wind speed visualization")
+    parser.add_argument("--start", type=time_bound(), help="起始时间（含），如 2025-04-12 或 '2025-04-12 06:00'")
+    parser.add_argument(
+        "--end",
+        type=time_bound(end_of_day=True),
+        help="结束时间（含），如 '2025-04-13 23:00'；只写日期时包含当天全部时间"
+    )
+    return parser.parse_args()
+
 def main():
     """主函数"""
+    args = parse_args()
+    
     # 设置日志
     setup_logging(verbose=True)
     logger = logging.getLogger(__name__)
@@ -39,7 +64,7 @@ def main():
     logger.info(f"District adcode mapping: {district_adcode_map}")
     
     # 加载数据
-    wind_df = load_wind_data(config.DISTRICT_FILES, beijing_geojson, config)
+    wind_df = load_wind_data(config.DISTRICT_FILES, beijing_geojson, config, start=args.start, end=args.end)
     
     if wind_df.empty:
         logger.error("No valid data loaded")
@@ -54,17 +79,40 @@ def main():
     if missing_in_geojson:
         logger.warning(f"Adcodes in data but not in GeoJSON: {missing_in_geojson}")
     
+    output_file = "beijing_wind_speed_map.html"
+    # 拓扑只构建一次：用于绘制边界线，并在embed_topology时嵌入HTML
+    topology = build_topology(beijing_geojson, config.VISUALIZATION_SETTINGS["topology_quantization"])
+    embed = config.VISUALIZATION_SETTINGS["embed_topology"]
+    
+    if config.PERFORMANCE_SETTINGS["fast_figure"]:
+        # 快速路径：以普通字典构建图形并直接写出HTML
+        logger.info("Creating visualization (fast path)...")
+        write_fast_html(
+            wind_df, beijing_geojson, config, output_file,
+            topology=topology,
+            workers=config.PERFORMANCE_SETTINGS["workers"],
+            embed=embed
+        )
+        logger.info(f"Visualization saved as {output_file}")
+        
+        # 显示图形
+        logger.info("Displaying visualization...")
+        webbrowser.open("file://" + os.path.abspath(output_file))
+        return
+    
     # 创建可视化
     logger.info("Creating visualization...")
-    fig = create_wind_visualization(wind_df, beijing_geojson, config)
+    fig = create_wind_visualization(wind_df, beijing_geojson, config, topology=topology)
     
     # 显示图形
     logger.info("Displaying visualization...")
     fig.show()
     
     # 保存为HTML文件
-    output_file = "beijing_wind_speed_map.html"
-    fig.write_html(output_file)
+    if embed:
+        write_html_with_topology(fig, output_file, topology)
+    else:
+        fig.write_html(output_file)
     logger.info(f"Visualization saved as {output_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+"""地图服务入口"""
+import os
+import sys
+import logging
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.map_service import MapService, MapServer
+from src.utils import setup_logging
+import config.settings as config
+
+def parse_args():
+    """解析命令行参数"""
+    settings = config.SERVICE_SETTINGS
+    parser = argparse.ArgumentParser(description="Beijing wind speed map service")
+    parser.add_argument("--host", default=settings["host"])
+    parser.add_argument("--port", type=int, default=settings["port"])
+    parser.add_argument("--workers", type=int, default=settings["workers"], help="构建图形的线程数")
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_args()
+    
+    # 设置日志
+    setup_logging(verbose=True)
+    logger = logging.getLogger(__name__)
+    
+    if not os.path.exists(config.GEOJSON_PATH):
+        logger.error(f"GeoJSON file does not exist - {config.GEOJSON_PATH}")
+        return
+    
+    service = MapService(
+        config,
+        cache_max_bytes=config.SERVICE_SETTINGS["cache_max_bytes"],
+        reload_check_interval=config.SERVICE_SETTINGS["reload_check_interval"],
+        workers=args.workers
+    )
+    server = MapServer((args.host, args.port), service, config.SERVICE_SETTINGS["keepalive_timeout"])
+    logger.info(f"Serving wind speed maps on http://{args.host}:{args.port}/")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    main()
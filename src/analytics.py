@@ -0,0 +1,213 @@
+"""风速分析模块 - 滚动窗口统计和阈值告警
+
+所有计算都在 时间×区域 矩阵上按列向量化（与build_wind_matrix的布局一致）。
+批量计算一次遍历所有区域；增量计算每输入一个时间片的开销与窗口长度无关。
+"""
+import numpy as np
+
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal
+}
+
+STATISTICS = ("value", "mean", "max")
+
+def _window_max(matrix, window):
+    """滚动窗口最大值（van Herk/Gil-Werman分块前缀/后缀最大值，忽略NaN）"""
+    n_times, n_districts = matrix.shape
+    n_blocks = -(-n_times // window)
+    padded = np.full((n_blocks * window, n_districts), np.nan)
+    padded[:n_times] = matrix
+    blocks = padded.reshape(n_blocks, window, n_districts)
+
+    prefix = np.fmax.accumulate(blocks, axis=1).reshape(-1, n_districts)[:n_times]
+    suffix = np.fmax.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_districts)
+
+    # 窗口 [t-window+1, t] 由上一块的后缀和当前块的前缀组成，窗口起点对齐块起点时后缀即整块；
+    # 前window个时间步的窗口只有第一块的前缀
+    if n_times > window:
+        np.fmax(suffix[1:n_times - window + 1], prefix[window:], out=prefix[window:])
+    return prefix
+
+def _window_mean(matrix, window):
+    """滚动窗口平均值（累积和相减，忽略NaN，窗口内无数据时为NaN）"""
+    valid = np.isfinite(matrix)
+    sums = np.where(valid, matrix, 0.0)
+    np.cumsum(sums, axis=0, out=sums)
+    sums[window:] -= sums[:-window].copy()
+
+    if valid.all():
+        # 没有缺测时每个窗口的计数只取决于时间位置
+        counts = np.minimum(np.arange(1, len(matrix) + 1), window)[:, None]
+    else:
+        counts = np.cumsum(valid, axis=0, dtype=np.int32)
+        counts[window:] -= counts[:-window].copy()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sums /= counts
+    return sums
+
+def rolling_statistics(wind_matrix, window):
+    """一次计算所有区域的滚动平均值和最大值，返回 (mean, max)，形状与wind_matrix相同"""
+    wind_matrix = np.asarray(wind_matrix, dtype=float)
+    return _window_mean(wind_matrix, window), _window_max(wind_matrix, window)
+
+def _run_lengths(condition):
+    """每个位置上条件已连续成立的时间步数"""
+    index = np.arange(len(condition))[:, None]
+    last_false = np.maximum.accumulate(np.where(condition, -1, index), axis=0)
+    return index - last_false
+
+def _rule_steps(rule, step_hours):
+    """将规则中以小时为单位的窗口和持续时间换算为时间步数"""
+    window = max(int(np.ceil(rule.get("window_hours", 1) / step_hours)), 1)
+    duration = max(int(np.ceil(rule.get("duration_hours", 1) / step_hours)), 1)
+    return window, duration
+
+def validate_rule(rule):
+    """检查告警规则的配置，无效时抛出ValueError"""
+    if "name" not in rule or "threshold" not in rule:
+        raise ValueError(f"Alert rule requires 'name' and 'threshold': {rule}")
+    if rule.get("statistic", "value") not in STATISTICS:
+        raise ValueError(f"Unknown statistic in alert rule {rule['name']}: {rule.get('statistic')}")
+    if rule.get("operator", ">") not in OPERATORS:
+        raise ValueError(f"Unknown operator in alert rule {rule['name']}: {rule.get('operator')}")
+
+def evaluate_rules(wind_matrix, rules, step_hours=1):
+    """批量评估告警规则，返回 {规则名: 时间×区域布尔矩阵}
+
+    规则示例: {"name": "持续大风", "statistic": "value", "threshold": 8.0, "duration_hours": 3}
+    statistic为value（原始值）、mean或max（window_hours内的滚动统计）；
+    条件连续成立duration_hours后的每个时间步都处于告警状态。
+    """
+    wind_matrix = np.asarray(wind_matrix, dtype=float)
+    cache = {}
+    alerts = {}
+
+    for rule in rules:
+        validate_rule(rule)
+        window, duration = _rule_steps(rule, step_hours)
+        statistic = rule.get("statistic", "value")
+
+        if statistic == "value":
+            series = wind_matrix
+        else:
+            if window not in cache:
+                cache[window] = rolling_statistics(wind_matrix, window)
+            series = cache[window][0 if statistic == "mean" else 1]
+
+        with np.errstate(invalid='ignore'):
+            condition = OPERATORS[rule.get("operator", ">")](series, rule["threshold"])
+        alerts[rule["name"]] = _run_lengths(condition) >= duration
+
+    return alerts
+
+def combine_alerts(alerts, shape):
+    """合并所有规则的告警矩阵"""
+    combined = np.zeros(shape, dtype=bool)
+    for matrix in alerts.values():
+        combined |= matrix
+    return combined
+
+def summarize_alerts(alerts, unique_times, district_names):
+    """将告警矩阵整理为告警事件列表（按规则和区域合并连续的告警时间步）"""
+    events = []
+    for name, matrix in alerts.items():
+        padded = np.zeros((matrix.shape[0] + 2, matrix.shape[1]), dtype=np.int8)
+        padded[1:-1] = matrix
+        changes = np.diff(padded, axis=0)
+        for (start, column), (end, _) in zip(np.argwhere(changes.T == 1)[:, ::-1], np.argwhere(changes.T == -1)[:, ::-1]):
+            events.append({
+                "rule": name,
+                "district": district_names[column],
+                "start": unique_times[start],
+                "end": unique_times[end - 1],
+                "steps": int(end - start)
+            })
+    events.sort(key=lambda event: (event["start"], event["rule"], event["district"]))
+    return events
+
+class RollingStatistics:
+    """逐时间片增量更新的滚动平均值和最大值
+
+    所有区域作为一个向量同时更新。平均值维护窗口内的和与计数；最大值采用
+    van Herk/Gil-Werman方法：每满一个窗口长度计算一次后缀最大值，
+    因此每个时间片的均摊开销为O(1)（与窗口长度无关）。
+    """
+
+    def __init__(self, n_districts, window):
+        self.window = window
+        self._values = np.full((window, n_districts), np.nan)
+        self._suffix = np.full((window + 1, n_districts), np.nan)
+        self._prefix = np.full(n_districts, np.nan)
+        self._sums = np.zeros(n_districts)
+        self._counts = np.zeros(n_districts, dtype=np.int64)
+        self._position = 0
+
+    def update(self, values):
+        """输入一个时间片（每个区域一个值，缺失为NaN），返回 (mean, max)"""
+        values = np.asarray(values, dtype=float)
+        position = self._position
+        valid = np.isfinite(values)
+
+        # 移出窗口的是window个时间步之前写在同一位置的值
+        old = self._values[position]
+        old_valid = np.isfinite(old)
+        self._sums += np.where(valid, values, 0.0) - np.where(old_valid, old, 0.0)
+        self._counts += valid.astype(np.int64) - old_valid
+        self._values[position] = values
+
+        self._prefix = values.copy() if position == 0 else np.fmax(self._prefix, values)
+        maximum = np.fmax(self._suffix[position + 1], self._prefix)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(self._counts > 0, self._sums / np.maximum(self._counts, 1), np.nan)
+
+        if position == self.window - 1:
+            # 块已满：计算后缀最大值供下一块使用，并重新求和以消除浮点误差累积
+            with np.errstate(invalid='ignore'):
+                self._suffix[:-1] = np.fmax.accumulate(self._values[::-1], axis=0)[::-1]
+            self._sums = np.nansum(self._values, axis=0)
+            self._position = 0
+        else:
+            self._position = position + 1
+
+        return mean, maximum
+
+class AlertEngine:
+    """增量评估告警规则：每输入一个时间片，返回该时间片上各规则的告警区域"""
+
+    def __init__(self, rules, n_districts, step_hours=1):
+        for rule in rules:
+            validate_rule(rule)
+        self.rules = list(rules)
+        self._statistics = {}
+        self._steps = []
+        for rule in self.rules:
+            window, duration = _rule_steps(rule, step_hours)
+            if rule.get("statistic", "value") != "value" and window not in self._statistics:
+                self._statistics[window] = RollingStatistics(n_districts, window)
+            self._steps.append((window, duration))
+        self._runs = [np.zeros(n_districts, dtype=np.int64) for _ in self.rules]
+
+    def update(self, values):
+        """输入一个时间片，返回 {规则名: 区域布尔数组}"""
+        values = np.asarray(values, dtype=float)
+        statistics = {window: stats.update(values) for window, stats in self._statistics.items()}
+        alerts = {}
+
+        for k, (rule, (window, duration)) in enumerate(zip(self.rules, self._steps)):
+            statistic = rule.get("statistic", "value")
+            if statistic == "value":
+                series = values
+            else:
+                series = statistics[window][0 if statistic == "mean" else 1]
+
+            with np.errstate(invalid='ignore'):
+                condition = OPERATORS[rule.get("operator", ">")](series, rule["threshold"])
+            self._runs[k] = np.where(condition, self._runs[k] + 1, 0)
+            alerts[rule["name"]] = self._runs[k] >= duration
+
+        return alerts
@@ -1,11 +1,31 @@
 """数据加载和处理模块"""
+import io
 import os
+import re
+import numpy as np
 import pandas as pd
 import logging
+from datetime import datetime
 from .utils import standardize_district_name
 
 logger = logging.getLogger(__name__)
 
+# 数据质量标记
+QUALITY_OBSERVED = 0      # 观测值
+QUALITY_INTERPOLATED = 1  # 线性插值
+QUALITY_FILLED = 2        # 前向填充
+QUALITY_MISSING = 3       # 缺测（未填补）
+QUALITY_SHIFTED = 4       # 观测值，时间戳取整到时间轴
+QUALITY_NAMES = {
+    QUALITY_OBSERVED: "observed",
+    QUALITY_INTERPOLATED: "interpolated",
+    QUALITY_FILLED: "forward filled",
+    QUALITY_MISSING: "missing",
+    QUALITY_SHIFTED: "shifted to time axis"
+}
+
+GAP_FILL_POLICIES = ("none", "linear", "ffill")
+
 def detect_csv_format(file_path, encoding="gbk"):
     """检测CSV文件格式"""
     try:
@@ -29,8 +49,235 @@ def detect_csv_format(file_path, encoding="gbk"):
         logger.error(f"Error detecting CSV format for {file_path}: {str(e)}")
         return 0, []
 
-def load_wind_data(district_files, geojson, config):
-    """加载所有区域的风速数据"""
+_DATE_ONLY_RE = re.compile(r'^\s*\d{4}[-/]\d{1,2}[-/]\d{1,2}\s*$')
+
+def parse_time_bound(value, end_of_day=False):
+    """解析时间范围边界，None或空字符串表示不限制，无法解析时抛出ValueError
+
+    end_of_day时只有日期的值（如 2025-04-12）表示当天的最后时刻，用于闭区间的终点
+    """
+    if value is None or value == "":
+        return None
+    timestamp = pd.Timestamp(value)
+    if end_of_day and isinstance(value, str) and _DATE_ONLY_RE.match(value):
+        timestamp += pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    return timestamp
+
+def _parse_row_time(line, encoding, date_idx, time_idx):
+    """解析数据行中的日期和时间列，无法解析时返回None"""
+    parts = line.decode(encoding, errors='ignore').split(',')
+    if len(parts) <= max(date_idx, time_idx):
+        return None
+    text = f"{parts[date_idx].strip()} {parts[time_idx].strip()}"
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            return pd.Timestamp(text)
+        except (ValueError, TypeError):
+            return None
+
+def _line_start_at_or_after(f, offset):
+    """返回不小于offset的第一个行首位置"""
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+def _find_first_row(f, lo, hi, target, row_time):
+    """二分查找第一条时间不早于target的数据行的字节偏移（lo必须是行首）"""
+    while lo < hi:
+        mid = _line_start_at_or_after(f, (lo + hi) // 2)
+        if mid >= hi:
+            break
+        f.seek(mid)
+        line = f.readline()
+        row = row_time(line)
+        if row is not None and row < target:
+            lo = mid + len(line)
+        else:
+            hi = mid
+    
+    # 剩余区间不足一行，顺序查找
+    f.seek(lo)
+    while lo < hi:
+        line = f.readline()
+        row = row_time(line)
+        if row is None or row >= target:
+            break
+        lo += len(line)
+    return lo
+
+def _previous_row(f, offset, data_offset, max_line=4096):
+    """返回offset（行首或文件末尾）之前的一行数据，没有时返回None"""
+    if offset <= data_offset:
+        return None
+    block_start = max(data_offset, offset - max_line)
+    f.seek(block_start)
+    lines = f.read(offset - block_start).rstrip(b'\r\n').split(b'\n')
+    if block_start > data_offset and len(lines) < 2:
+        return None
+    return lines[-1]
+
+def read_time_window(file_path, header_row, encoding, start=None, end=None):
+    """只读取时间窗口内的数据行，返回包含表头的缓冲区
+
+    数据行必须按时间升序排列：起点用二分查找定位，超过终点后停止读取。
+    读取时检查 首行 ≤ 窗口前一行 ≤ 窗口内各行 ≤ 窗口后一行 ≤ 末行 是否成立，
+    发现乱序时记录警告并返回None，由调用方改为读取整个文件。
+    缺少日期或时间列时也返回None。
+    """
+    with open(file_path, 'rb') as f:
+        for _ in range(header_row):
+            f.readline()
+        header = f.readline()
+        data_offset = f.tell()
+        file_size = f.seek(0, os.SEEK_END)
+        
+        columns = [col.strip() for col in header.decode(encoding, errors='ignore').split(',')]
+        if '日期' not in columns or '时间' not in columns:
+            return None
+        date_idx, time_idx = columns.index('日期'), columns.index('时间')
+        
+        def row_time(line):
+            return _parse_row_time(line, encoding, date_idx, time_idx)
+        
+        def unsorted(row, previous):
+            logger.warning(f"{file_path} is not sorted by time ({row} after {previous}), reading the whole file")
+            return None
+        
+        f.seek(data_offset)
+        first = row_time(f.readline())
+        line = _previous_row(f, file_size, data_offset)
+        last = row_time(line) if line is not None else None
+        
+        offset = data_offset
+        previous = first
+        if start is not None:
+            offset = _find_first_row(f, data_offset, file_size, start, row_time)
+            line = _previous_row(f, offset, data_offset)
+            row = row_time(line) if line is not None else None
+            if row is not None:
+                if previous is not None and row < previous:
+                    return unsorted(row, previous)
+                previous = row
+        
+        f.seek(offset)
+        lines = [header]
+        for line in f:
+            row = row_time(line)
+            if row is not None:
+                if previous is not None and row < previous:
+                    return unsorted(row, previous)
+                previous = row
+                if end is not None and row > end:
+                    break
+            lines.append(line)
+        
+        if last is not None and previous is not None and last < previous:
+            return unsorted(last, previous)
+    
+    logger.debug(f"Time window rows read from {file_path}: {len(lines) - 1}")
+    return io.BytesIO(b''.join(lines))
+
+def select_time_range(df, start=None, end=None):
+    """按时间范围选择数据（闭区间），在有序的时间列上二分查找"""
+    if start is None and end is None:
+        return df
+    if not df['datetime'].is_monotonic_increasing:
+        df = df.sort_values('datetime', kind='stable', ignore_index=True)
+    times = df['datetime']
+    lo = times.searchsorted(start, side='left') if start is not None else 0
+    hi = times.searchsorted(end, side='right') if end is not None else len(df)
+    return df.iloc[lo:hi]
+
+def _fill_gaps(matrix, policy, max_gap=None):
+    """按策略填补 时间×区域 矩阵每列中的缺测，返回 (填补后的矩阵, 质量标记矩阵)
+
+    linear只填补两侧都有观测且长度不超过max_gap的缺口；ffill最多向后填充max_gap步。
+    max_gap为None时不限制。
+    """
+    valid = np.isfinite(matrix)
+    quality = np.where(valid, QUALITY_OBSERVED, QUALITY_MISSING).astype(np.int8)
+    if policy == "none" or valid.all():
+        return matrix, quality
+    
+    n_times = len(matrix)
+    index = np.arange(n_times)[:, None]
+    # 每个位置之前（含）最近一次观测的位置，没有时为-1
+    prev_idx = np.maximum.accumulate(np.where(valid, index, -1), axis=0)
+    previous = np.take_along_axis(matrix, np.maximum(prev_idx, 0), axis=0)
+    
+    if policy == "ffill":
+        fill = ~valid & (prev_idx >= 0)
+        if max_gap is not None:
+            fill &= index - prev_idx <= max_gap
+        filled, code = previous, QUALITY_FILLED
+    else:
+        # 每个位置之后（含）最近一次观测的位置，没有时为n_times
+        next_idx = np.minimum.accumulate(np.where(valid, index, n_times)[::-1], axis=0)[::-1]
+        following = np.take_along_axis(matrix, np.minimum(next_idx, n_times - 1), axis=0)
+        fill = ~valid & (prev_idx >= 0) & (next_idx < n_times)
+        if max_gap is not None:
+            fill &= next_idx - prev_idx - 1 <= max_gap
+        weight = (index - prev_idx) / np.maximum(next_idx - prev_idx, 1)
+        filled, code = previous + (following - previous) * weight, QUALITY_INTERPOLATED
+    
+    quality[fill] = code
+    return np.where(fill, filled, matrix), quality
+
+def regularize_time_axis(df, freq="h", policy="none", max_gap=None):
+    """将所有区域对齐到同一个等间隔时间轴，按策略填补缺测，并添加quality列标记数据来源
+
+    偏离时间轴的时间戳取整到最近的时间点（同一时间点的多个值取平均，标记为QUALITY_SHIFTED），
+    然后对整个时间×区域矩阵做一次reindex。未填补的缺测保留为wind_speed为NaN的行，
+    因此每个时间点都有全部区域的记录，帧数只由时间轴决定。
+    """
+    if policy not in GAP_FILL_POLICIES:
+        raise ValueError(f"Unknown gap fill policy: {policy}, expected one of {GAP_FILL_POLICIES}")
+    if df.empty:
+        return df.assign(quality=pd.Series(dtype=np.int8))
+    
+    times = df['datetime'].dt.round(freq)
+    offset_count = int((times != df['datetime']).sum())
+    if offset_count:
+        logger.warning(f"{offset_count} timestamps not on the {freq} axis were rounded to the nearest time point")
+    
+    districts = df.drop_duplicates('adcode')[['adcode', 'district']].reset_index(drop=True)
+    axis = pd.date_range(times.min(), times.max(), freq=freq)
+    wide = df.assign(datetime=times).pivot_table(index='datetime', columns='adcode', values='wind_speed', aggfunc='mean')
+    wide = wide.reindex(index=axis, columns=districts['adcode'])
+    
+    values, quality = _fill_gaps(wide.to_numpy(dtype=float), policy, max_gap)
+    if offset_count:
+        shifted = df.assign(datetime=times, shifted=times != df['datetime']).pivot_table(
+            index='datetime', columns='adcode', values='shifted', aggfunc='max'
+        )
+        shifted = shifted.reindex(index=axis, columns=districts['adcode'], fill_value=False).to_numpy(dtype=bool)
+        quality[shifted & (quality == QUALITY_OBSERVED)] = QUALITY_SHIFTED
+    log_data_quality(quality, districts['district'].tolist())
+    
+    # 展开为按时间排序的长表，每个时间点内的区域顺序固定
+    n_times, n_districts = values.shape
+    return pd.DataFrame({
+        'datetime': np.repeat(axis.values, n_districts),
+        'district': np.tile(districts['district'].to_numpy(), n_times),
+        'adcode': np.tile(districts['adcode'].to_numpy(), n_times),
+        'wind_speed': values.ravel(),
+        'quality': quality.ravel()
+    })
+
+def log_data_quality(quality, district_names):
+    """在日志中输出每个区域取整、插值、填补和缺测的时间点数"""
+    counts = {code: (quality == code).sum(axis=0) for code in QUALITY_NAMES if code != QUALITY_OBSERVED}
+    for column, district in enumerate(district_names):
+        parts = [f"{QUALITY_NAMES[code]}: {int(count[column])}" for code, count in counts.items() if count[column]]
+        if parts:
+            logger.warning(f"Data quality for {district}: {', '.join(parts)} of {len(quality)} time points")
+
+def load_wind_data(district_files, geojson, config, start=None, end=None):
+    """加载所有区域的风速数据，start/end为时间范围（闭区间）"""
     from .geojson_processor import create_district_adcode_map
     
     # 创建区名到adcode的映射
@@ -40,7 +287,12 @@ def load_wind_data(district_files, geojson, config):
     missing_districts = []
     processed_files = 0
     
+    start = parse_time_bound(start)
+    end = parse_time_bound(end, end_of_day=True)
+    
     logger.info("Loading wind speed data...")
+    if start is not None or end is not None:
+        logger.info(f"Time range filter: {start or '-'} to {end or '-'}")
     
     for district, file_path in district_files.items():
         # 检查文件是否存在
@@ -59,11 +311,23 @@ def load_wind_data(district_files, geojson, config):
                 data_start_row = config.DATA_PROCESSING_SETTINGS["csv_header_row"]
                 logger.warning(f"Using default header row: {data_start_row}")
             
-            # 读取CSV文件
+            # 读取CSV文件：指定时间范围且文件按时间排序时，只读取窗口内的行
+            source, header_row = file_path, data_start_row
+            if (start is not None or end is not None) and config.DATA_PROCESSING_SETTINGS["csv_sorted_by_time"]:
+                window = read_time_window(
+                    file_path,
+                    data_start_row,
+                    config.DATA_PROCESSING_SETTINGS["csv_encoding"],
+                    start,
+                    end
+                )
+                if window is not None:
+                    source, header_row = window, 0
+            
             df = pd.read_csv(
-                file_path, 
+                source, 
                 encoding=config.DATA_PROCESSING_SETTINGS["csv_encoding"], 
-                header=data_start_row
+                header=header_row
             )
             
             # 清理列名：去除前后空格和不可见字符
@@ -137,9 +401,21 @@ def load_wind_data(district_files, geojson, config):
             import traceback
             traceback.print_exc()
     
-    # 合并所有数据
+    # 合并所有数据，按时间排序以便按时间范围二分查找
     if all_data:
         full_df = pd.concat(all_data, ignore_index=True)
+        full_df = full_df.sort_values('datetime', kind='stable', ignore_index=True)
+        full_df = select_time_range(full_df, start, end).reset_index(drop=True)
+        
+        # 对齐到等间隔时间轴，缺测按配置的策略填补
+        settings = config.DATA_PROCESSING_SETTINGS
+        if settings["regularize_time_axis"]:
+            full_df = regularize_time_axis(
+                full_df,
+                settings["time_frequency"],
+                settings["gap_fill"],
+                settings["max_gap_steps"]
+            )
     else:
         full_df = pd.DataFrame(columns=['datetime', 'district', 'adcode', 'wind_speed'])
     
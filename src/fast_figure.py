@@ -0,0 +1,257 @@
+"""快速图形构建模块 - 以普通字典组装图形和动画帧，跳过plotly的逐对象校验"""
+import os
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from .visualization import (
+    create_wind_visualization,
+    build_wind_matrix,
+    build_quality_notes,
+    detect_alerts,
+    alert_marker_sizes,
+    step_label,
+    label_template,
+    slider_step_args,
+    embed_topology,
+    TOPOLOGY_FEATURES_PLACEHOLDER,
+    TOPOLOGY_MESH_PLACEHOLDER
+)
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，缺失时使用plotly自带的序列化
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 输出骨架中滑块步骤和动画帧的占位符
+STEPS_PLACEHOLDER = "__FAST_FIGURE_STEPS__"
+FRAMES_PLACEHOLDER = "__FAST_FIGURE_FRAMES__"
+
+# 少于该帧数时在当前进程中构建，避免进程池的启动开销
+PARALLEL_MIN_FRAMES = 2000
+
+def _default(obj):
+    """orjson无法直接处理的对象（如对象类型或非连续的数组）"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(obj):
+    """序列化为JSON字节（支持NumPy数组，NaN输出为null）"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return pio.json.to_json_plotly(obj, engine="json").encode("utf-8")
+
+def _rows(matrix, start, stop):
+    """告警标记大小矩阵或数据质量说明列表的一段行，为None时返回None"""
+    return matrix[start:stop] if matrix is not None else None
+
+def _or_none(matrix, length):
+    return matrix if matrix is not None else [None] * length
+
+def build_steps(step_template, labels, wind_matrix, alert_sizes=None, quality_notes=None):
+    """按模板构建滑块步骤字典"""
+    return [
+        dict(
+            step_template,
+            args=slider_step_args(values, sizes, notes),
+            label=label
+        )
+        for label, values, sizes, notes in zip(
+            labels, wind_matrix, _or_none(alert_sizes, len(labels)), _or_none(quality_notes, len(labels))
+        )
+    ]
+
+def build_frames(frame_template, names, wind_matrix, start=0, alert_sizes=None, quality_notes=None):
+    """按模板构建一段时间的动画帧字典，start为第一帧的时间索引"""
+    choropleth_template, *alert_template, text_template = frame_template['data']
+    frames = []
+
+    for k, (name, values) in enumerate(zip(names, wind_matrix)):
+        if np.isnan(values).all():
+            continue
+        choropleth = dict(choropleth_template, z=values)
+        if quality_notes is not None:
+            choropleth['text'] = quality_notes[k]
+        data = [choropleth]
+        if alert_sizes is not None:
+            data.append(dict(alert_template[0], marker=dict(alert_template[0]['marker'], size=alert_sizes[k])))
+        data.append(dict(text_template, text=values, texttemplate=label_template(values)))
+        frames.append(dict(
+            frame_template,
+            data=data,
+            layout={'sliders': [{'active': start + k}]},
+            name=name
+        ))
+
+    return frames
+
+def _serialize_frame_chunk(frame_template, names, wind_matrix, start, alert_sizes=None, quality_notes=None):
+    """构建并序列化一段帧，返回不含外层方括号的JSON（供工作进程调用）"""
+    return dumps(build_frames(frame_template, names, wind_matrix, start, alert_sizes, quality_notes))[1:-1]
+
+def _iter_frame_chunks(frame_template, names, wind_matrix, workers=None, alert_sizes=None, quality_notes=None):
+    """按时间分块序列化动画帧，帧数较多时分配到多个进程"""
+    total = len(names)
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or total < PARALLEL_MIN_FRAMES:
+        yield _serialize_frame_chunk(frame_template, names, wind_matrix, 0, alert_sizes, quality_notes)
+        return
+
+    chunk_size = -(-total // (workers * 4))
+    logger.info(f"Serializing {total} frames in {-(-total // chunk_size)} chunks with {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _serialize_frame_chunk,
+                frame_template,
+                names[start:start + chunk_size],
+                wind_matrix[start:start + chunk_size],
+                start,
+                _rows(alert_sizes, start, start + chunk_size),
+                _rows(quality_notes, start, start + chunk_size)
+            )
+            for start in range(0, total, chunk_size)
+        ]
+        for future in futures:
+            yield future.result()
+
+def _prepare(df, geojson, config, topology=None):
+    """用常规流程构建只含第一个时间点的图形，得到经过plotly校验的模板"""
+    fig = create_wind_visualization(df, geojson, config, template_only=True, topology=topology)
+    figure = fig.to_plotly_json()
+    if not figure.get('frames'):
+        return figure, None
+
+    unique_times = pd.DatetimeIndex(sorted(df['datetime'].unique()))
+    districts, wind_matrix = build_wind_matrix(df, unique_times)
+    alert_sizes = alert_marker_sizes(detect_alerts(wind_matrix, unique_times, config), wind_matrix.shape, config)
+    quality_notes = build_quality_notes(df, unique_times, districts)
+
+    context = {
+        'step_template': figure['layout']['sliders'][0]['steps'][0],
+        'frame_template': figure['frames'][0],
+        'labels': [step_label(t, _rows(alert_sizes, i, i + 1)) for i, t in enumerate(unique_times)],
+        'names': unique_times.strftime('%Y-%m-%d %H:%M').tolist(),
+        'wind_matrix': wind_matrix,
+        'alert_sizes': alert_sizes,
+        'quality_notes': quality_notes
+    }
+
+    # 校验：按字典构建的第一个步骤和帧必须与plotly生成的模板完全一致
+    step = build_steps(
+        context['step_template'], context['labels'][:1], wind_matrix[:1],
+        _rows(alert_sizes, 0, 1), _rows(quality_notes, 0, 1)
+    )[0]
+    frame = build_frames(
+        context['frame_template'], context['names'][:1], wind_matrix[:1], 0,
+        _rows(alert_sizes, 0, 1), _rows(quality_notes, 0, 1)
+    )[0]
+    if _canonical(step) != _canonical(context['step_template']) \
+            or _canonical(frame) != _canonical(context['frame_template']):
+        raise ValueError("Fast figure templates do not match the validated plotly figure")
+
+    return figure, context
+
+def _canonical(obj):
+    """用于比较的规范化JSON"""
+    return json.dumps(json.loads(dumps(obj)), sort_keys=True)
+
+def build_figure_dict(df, geojson, config, topology=None):
+    """以普通字典构建完整图形（data、layout、frames），与create_wind_visualization等价"""
+    figure, context = _prepare(df, geojson, config, topology)
+    if context is None:
+        return figure
+
+    figure['layout']['sliders'][0]['steps'] = build_steps(
+        context['step_template'], context['labels'], context['wind_matrix'],
+        context['alert_sizes'], context['quality_notes']
+    )
+    figure['frames'] = build_frames(
+        context['frame_template'], context['names'], context['wind_matrix'], 0,
+        context['alert_sizes'], context['quality_notes']
+    )
+    return figure
+
+def _use_topology_placeholders(figure):
+    """将填充层geojson和边界线图层替换为拓扑占位符"""
+    for trace in figure['data']:
+        if trace.get('geojson') is not None:
+            trace['geojson'] = TOPOLOGY_FEATURES_PLACEHOLDER
+    for layer in figure['layout'].get('mapbox', {}).get('layers', []):
+        if layer.get('type') == 'line':
+            layer['source'] = TOPOLOGY_MESH_PLACEHOLDER
+
+def _write_skeleton(f, skeleton, context, workers):
+    """写出骨架，并在占位符处流式写入滑块步骤和动画帧"""
+    steps_marker = json.dumps(STEPS_PLACEHOLDER).encode('utf-8')
+    frames_marker = json.dumps(FRAMES_PLACEHOLDER).encode('utf-8')
+    head, rest = skeleton.split(steps_marker, 1)
+    middle, tail = rest.split(frames_marker, 1)
+
+    f.write(head)
+    f.write(dumps(build_steps(
+        context['step_template'], context['labels'], context['wind_matrix'],
+        context['alert_sizes'], context['quality_notes']
+    )))
+    f.write(middle)
+
+    f.write(b"[")
+    first = True
+    for chunk in _iter_frame_chunks(
+        context['frame_template'], context['names'], context['wind_matrix'], workers,
+        context['alert_sizes'], context['quality_notes']
+    ):
+        if not chunk:
+            continue
+        if not first:
+            f.write(b",")
+        f.write(chunk)
+        first = False
+    f.write(b"]")
+
+    f.write(tail)
+
+def _skeleton_figure(df, geojson, config, topology=None):
+    figure, context = _prepare(df, geojson, config, topology)
+    if context is not None:
+        figure['layout']['sliders'][0]['steps'] = STEPS_PLACEHOLDER
+        figure['frames'] = FRAMES_PLACEHOLDER
+    return figure, context
+
+def write_fast_html(df, geojson, config, file_path, topology=None, workers=None, embed=True, **kwargs):
+    """快速构建并保存HTML文件，topology不为空时用于绘制边界线，embed时以拓扑编码嵌入边界数据"""
+    figure, context = _skeleton_figure(df, geojson, config, topology)
+    embed = embed and topology is not None
+    if embed:
+        _use_topology_placeholders(figure)
+
+    html = pio.to_html(figure, validate=False, **kwargs)
+    if embed:
+        html = embed_topology(html, topology)
+
+    with open(file_path, 'wb') as f:
+        if context is None:
+            f.write(html.encode('utf-8'))
+        else:
+            _write_skeleton(f, html.encode('utf-8'), context, workers)
+
+def write_fast_json(df, geojson, config, file_path, topology=None, workers=None):
+    """快速构建并保存图形JSON（data、layout、frames）"""
+    figure, context = _skeleton_figure(df, geojson, config, topology)
+
+    with open(file_path, 'wb') as f:
+        if context is None:
+            f.write(dumps(figure))
+        else:
+            _write_skeleton(f, dumps(figure), context, workers)
@@ -21,16 +21,19 @@ def calculate_polygon_area(coords):
     return 0.5 * np.abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
 
 def calculate_polygon_centroid(coords):
-    """计算多边形的质心"""
-    area = calculate_polygon_area(coords)
-    if area == 0:
-        return np.mean(coords, axis=0)
-    
+    """计算多边形的质心（使用有向面积，与环的方向无关）"""
     x = coords[:, 0]
     y = coords[:, 1]
+    x_next = np.roll(x, -1)
+    y_next = np.roll(y, -1)
+    
+    cross = x * y_next - x_next * y
+    signed_area = 0.5 * np.sum(cross)
+    if signed_area == 0:
+        return np.mean(coords, axis=0)
     
-    cx = np.sum((x + np.roll(x, 1)) * (x * np.roll(y, 1) - np.roll(x, 1) * y)) / (6 * area)
-    cy = np.sum((y + np.roll(y, 1)) * (x * np.roll(y, 1) - np.roll(x, 1) * y)) / (6 * area)
+    cx = np.sum((x + x_next) * cross) / (6 * signed_area)
+    cy = np.sum((y + y_next) * cross) / (6 * signed_area)
     
     return np.array([cx, cy])
 
@@ -138,4 +141,205 @@ def get_adcode_centroids(geojson):
             if centroid:
                 adcode_centroids[adcode] = centroid
     
-    return adcode_centroids
\ No newline at end of file
+    return adcode_centroids
+
+# ----------------------------------------------------------------------
+# 拓扑编码（TopoJSON风格）：相邻区域的公共边界只存储一次
+# ----------------------------------------------------------------------
+
+def _iter_polygons(geometry):
+    """返回几何图形的多边形列表，非面要素返回None"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return None
+
+def _quantize_ring(ring, translate, k):
+    """量化环坐标为整数网格点，去除连续重复点并去掉闭合点"""
+    q = np.rint((np.asarray(ring, dtype=float)[:, :2] - translate) * k).astype(np.int64)
+    keep = np.ones(len(q), dtype=bool)
+    keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+    points = list(map(tuple, q[keep].tolist()))
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+def _find_junctions(rings):
+    """查找连接点：同一个点在不同位置出现时相邻点不同"""
+    neighbors = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, point in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % n]))
+            if neighbors.setdefault(point, pair) != pair:
+                junctions.add(point)
+    return junctions
+
+def _cut_ring(ring, junctions):
+    """在连接点处将环切分为弧段"""
+    cuts = [i for i, point in enumerate(ring) if point in junctions]
+    if not cuts:
+        # 没有公共边界的环：旋转到最小点作为起点，保证相同的环得到相同的弧
+        start = ring.index(min(ring))
+        rotated = ring[start:] + ring[:start]
+        return [rotated + [rotated[0]]]
+    
+    rotated = ring[cuts[0]:] + ring[:cuts[0]]
+    cuts = [i - cuts[0] for i in cuts] + [len(ring)]
+    rotated.append(rotated[0])
+    return [rotated[a:b + 1] for a, b in zip(cuts, cuts[1:])]
+
+def build_topology(geojson, quantization=1e6, object_name="districts"):
+    """将GeoJSON转换为TopoJSON风格的拓扑结构"""
+    # 公共边界识别为共享弧段只存储一次，弧段坐标经过量化和差分编码；
+    # 环由弧段索引表示，负索引 ~i 表示反向使用第i条弧段
+    features = geojson['features']
+    
+    # 计算量化参数
+    all_coords = [
+        np.asarray(ring, dtype=float)[:, :2]
+        for feature in features
+        for polygon in (_iter_polygons(feature['geometry']) or [])
+        for ring in polygon
+    ]
+    if not all_coords:
+        raise ValueError("GeoJSON contains no polygon geometry")
+    stacked = np.concatenate(all_coords)
+    x0, y0 = stacked.min(axis=0)
+    x1, y1 = stacked.max(axis=0)
+    kx = (quantization - 1) / (x1 - x0) if x1 > x0 else 1.0
+    ky = (quantization - 1) / (y1 - y0) if y1 > y0 else 1.0
+    translate = np.array([x0, y0])
+    k = np.array([kx, ky])
+    
+    # 量化所有环
+    quantized = []
+    for feature in features:
+        polygons = _iter_polygons(feature['geometry'])
+        if polygons is None:
+            quantized.append(None)
+            continue
+        quantized.append([[_quantize_ring(ring, translate, k) for ring in polygon] for polygon in polygons])
+    
+    junctions = _find_junctions(
+        ring for polygons in quantized if polygons for polygon in polygons for ring in polygon
+    )
+    
+    arcs = []
+    arc_index = {}
+    
+    def arc_ref(points):
+        key = tuple(points)
+        if key in arc_index:
+            return arc_index[key]
+        reverse_key = key[::-1]
+        if reverse_key in arc_index:
+            return ~arc_index[reverse_key]
+        arc_index[key] = len(arcs)
+        arcs.append(points)
+        return len(arcs) - 1
+    
+    geometries = []
+    for feature, polygons in zip(features, quantized):
+        geometry = feature['geometry']
+        if polygons is None:
+            # 非面要素原样保留
+            encoded = dict(geometry)
+        else:
+            polygon_arcs = [
+                [[arc_ref(segment) for segment in _cut_ring(ring, junctions)] for ring in polygon]
+                for polygon in polygons
+            ]
+            if geometry['type'] == 'Polygon':
+                encoded = {"type": "Polygon", "arcs": polygon_arcs[0]}
+            else:
+                encoded = {"type": "MultiPolygon", "arcs": polygon_arcs}
+        encoded["properties"] = feature.get('properties', {})
+        geometries.append(encoded)
+    
+    # 差分编码：首点为绝对坐标，其余为相对前一点的增量
+    encoded_arcs = []
+    for points in arcs:
+        a = np.asarray(points, dtype=np.int64)
+        a[1:] = np.diff(a, axis=0)
+        encoded_arcs.append(a.tolist())
+    
+    total_points = sum(len(ring) for polygons in quantized if polygons for polygon in polygons for ring in polygon)
+    logger.info(f"Topology built: {len(arcs)} arcs, {sum(len(a) for a in arcs)} arc points from {total_points} ring points")
+    
+    return {
+        "type": "Topology",
+        "transform": {"scale": [1 / kx, 1 / ky], "translate": [float(x0), float(y0)]},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded_arcs
+    }
+
+def _decode_arcs(topology):
+    """解码所有弧段为经纬度坐标数组"""
+    scale = np.array(topology['transform']['scale'])
+    translate = np.array(topology['transform']['translate'])
+    # 按量化精度保留小数位，避免输出多余的浮点位数
+    decimals = max(0, int(np.ceil(-np.log10(scale.min()))))
+    return [
+        np.round(np.cumsum(np.asarray(arc, dtype=np.int64), axis=0) * scale + translate, decimals)
+        for arc in topology['arcs']
+    ]
+
+def _ring_from_arcs(refs, decoded_arcs):
+    """根据弧段索引重建闭合环"""
+    parts = []
+    for i, ref in enumerate(refs):
+        coords = decoded_arcs[ref] if ref >= 0 else decoded_arcs[~ref][::-1]
+        parts.append(coords if i == 0 else coords[1:])
+    return np.concatenate(parts).tolist()
+
+def topology_to_geojson(topology, object_name="districts"):
+    """由拓扑结构重建GeoJSON要素集合"""
+    decoded_arcs = _decode_arcs(topology)
+    features = []
+    
+    for geometry in topology['objects'][object_name]['geometries']:
+        if geometry['type'] == 'Polygon':
+            coordinates = [_ring_from_arcs(refs, decoded_arcs) for refs in geometry['arcs']]
+        elif geometry['type'] == 'MultiPolygon':
+            coordinates = [
+                [_ring_from_arcs(refs, decoded_arcs) for refs in polygon]
+                for polygon in geometry['arcs']
+            ]
+        else:
+            coordinates = geometry['coordinates']
+        features.append({
+            "type": "Feature",
+            "properties": geometry.get('properties', {}),
+            "geometry": {"type": geometry['type'], "coordinates": coordinates}
+        })
+    
+    return {"type": "FeatureCollection", "features": features}
+
+def topology_to_mesh(topology):
+    """将所有弧段作为边界线输出，公共边界只绘制一次"""
+    decoded_arcs = _decode_arcs(topology)
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "properties": {},
+            "geometry": {
+                "type": "MultiLineString",
+                "coordinates": [arc.tolist() for arc in decoded_arcs]
+            }
+        }]
+    }
+
+# 浏览器端解码器：topologyFeatures(topo, name) 返回GeoJSON要素集合，
+# topologyMesh(topo) 返回所有弧段组成的边界线
+TOPOLOGY_DECODER_JS = """
+function topologyArcs(t){var s=t.transform.scale,d=t.transform.translate;return t.arcs.map(function(a){var x=0,y=0;return a.map(function(p){x+=p[0];y+=p[1];return[x*s[0]+d[0],y*s[1]+d[1]];});});}
+function topologyFeatures(t,name){var a=topologyArcs(t);
+function ring(r){var o=[];r.forEach(function(i,k){var c=i<0?a[~i].slice().reverse():a[i];o=o.concat(k?c.slice(1):c);});return o;}
+return{type:"FeatureCollection",features:t.objects[name].geometries.map(function(g){var c=g.type==="Polygon"?g.arcs.map(ring):g.type==="MultiPolygon"?g.arcs.map(function(p){return p.map(ring);}):g.coordinates;
+return{type:"Feature",properties:g.properties||{},geometry:{type:g.type,coordinates:c}};})};}
+function topologyMesh(t){return{type:"FeatureCollection",features:[{type:"Feature",properties:{},geometry:{type:"MultiLineString",coordinates:topologyArcs(t)}}]};}
+"""
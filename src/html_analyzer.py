@@ -0,0 +1,349 @@
+"""HTML输出分析模块 - 流式统计Plotly生成文件的体积构成"""
+import re
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 统计分类（互不重叠，合计等于文件大小）
+COMPONENTS = [
+    "plotlyjs",              # 内嵌的plotly.js库
+    "topology",              # 内嵌的边界拓扑及其解码脚本
+    "trace_geojson",         # 轨迹中的geojson
+    "layout_mapbox_layers",  # layout.mapbox.layers
+    "frames",                # 帧中未归入其他分类的部分
+    "slider_steps",          # 滑块步骤（含帧内复制的滑块）
+    "hover_text",            # 悬停/标签文本（字符串和模板）
+    "label_values",          # text/customdata中的数值（如浏览器端格式化的数值标签）
+    "data",                  # 初始轨迹的其他部分
+    "layout",                # 布局的其他部分
+    "config",                # 配置
+    "html",                  # 其余HTML/JS
+]
+
+HOVER_KEYS = {"hovertext", "hovertemplate", "texttemplate"}
+# 这些键的值可能是字符串也可能是数值：字符串计入hover_text，其余计入label_values
+VALUE_KEYS = {"text", "customdata"}
+
+# Plotly调用及其参数的根分类（参数0为div id）
+PLOTLY_CALLS = {
+    b"Plotly.newPlot(": {1: "data", 2: "layout", 3: "config"},
+    b"Plotly.addFrames(": {1: "frames"},
+}
+
+_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{}\[\]:,()]|["\']')
+_SCRIPT_OPEN = b"<script"
+# 可视化模块嵌入边界拓扑时使用的脚本标记
+_TOPOLOGY_SCRIPT_ID = b'id="district-topology"'
+_SCRIPT_CLOSE = b"</script>"
+
+
+def _classify(category, path):
+    """根据父分类和JSON路径确定子节点的分类"""
+    if category in ("trace_geojson", "layout_mapbox_layers", "hover_text", "label_values"):
+        return category
+
+    key = path[-1]
+    if key == "geojson":
+        return "trace_geojson"
+    if key in HOVER_KEYS and category in ("data", "frames", "slider_steps"):
+        return "hover_text"
+    if key in VALUE_KEYS and category in ("data", "frames", "slider_steps"):
+        return "label_values"
+    if key == "steps" and len(path) >= 3 and path[-3] == "sliders":
+        return "slider_steps"
+    if key == "layers" and len(path) >= 2 and path[-2] == "mapbox":
+        return "layout_mapbox_layers"
+    return category
+
+
+class _DuplicateTracker:
+    """统计重复出现的JSON片段"""
+
+    def __init__(self, min_size, max_size, max_entries=200000):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def add(self, fragment, path):
+        digest = hashlib.blake2b(fragment, digest_size=16).digest()
+        entry = self.entries.get(digest)
+        if entry is None:
+            if len(self.entries) >= self.max_entries:
+                self._prune()
+            self.entries[digest] = [1, len(fragment), path, fragment[:80]]
+        else:
+            entry[0] += 1
+
+    def _prune(self):
+        """丢弃只出现一次的片段，限制内存占用"""
+        self.entries = {k: v for k, v in self.entries.items() if v[0] > 1}
+        if len(self.entries) >= self.max_entries:
+            logger.warning("Too many duplicated fragments, hot spot statistics are approximate")
+            keep = sorted(self.entries.items(), key=lambda kv: -(kv[1][0] - 1) * kv[1][1])
+            self.entries = dict(keep[:self.max_entries // 2])
+
+    def hot_spots(self, top_n):
+        """按冗余字节数排序返回重复片段"""
+        spots = [
+            {
+                "path": path,
+                "count": count,
+                "size": size,
+                "wasted_bytes": (count - 1) * size,
+                "preview": preview.decode("utf-8", errors="replace"),
+            }
+            for count, size, path, preview in self.entries.values()
+            if count > 1
+        ]
+        spots.sort(key=lambda s: s["wasted_bytes"], reverse=True)
+        return spots[:top_n]
+
+
+class HtmlSizeAnalyzer:
+    """流式分析Plotly HTML文件，按组件统计字节数"""
+
+    def __init__(self, top_n=10, min_fragment=256, max_fragment=4 * 1024 * 1024):
+        self.top_n = top_n
+        self.components = dict.fromkeys(COMPONENTS, 0)
+        self.frame_sizes = []
+        self.duplicates = _DuplicateTracker(min_fragment, max_fragment)
+        self.plotly_calls = []
+
+        self._mode = "html"
+        self._script_category = None  # script模式下整个脚本所属的分类
+        self._offset = 0          # 已消费字节的绝对位置
+        self._last = 0            # 已计入分类的绝对位置
+        self._buffer = b""
+        self._history = bytearray()  # 最近的字节，用于计算重复片段
+        self._history_base = 0
+
+        self._eof = False
+        self._call_roots = None
+        self._arg_index = 0
+        self._stack = []
+
+    # ------------------------------------------------------------------
+    # 字节计数
+    # ------------------------------------------------------------------
+    def _account(self, end, category):
+        if end > self._last:
+            self.components[category] += end - self._last
+            self._last = end
+
+    def _current_category(self):
+        if self._mode == "script":
+            return self._script_category
+        if self._mode == "call" and self._stack:
+            return self._stack[-1]["child_category"]
+        return "html"
+
+    # ------------------------------------------------------------------
+    # 数据输入
+    # ------------------------------------------------------------------
+    def feed(self, chunk):
+        """输入一段字节数据"""
+        data = self._buffer + chunk
+        base = self._offset - len(self._buffer)
+        self._remember(chunk)
+        self._offset += len(chunk)
+
+        pos = 0
+        while pos < len(data):
+            if self._mode == "html":
+                consumed = self._scan_html(data, pos, base)
+            elif self._mode == "script":
+                consumed = self._scan_script(data, pos, base)
+            else:
+                consumed = self._scan_call(data, pos, base)
+            if consumed is None or consumed == pos:
+                # 需要更多数据
+                break
+            pos = consumed
+
+        self._buffer = data[pos:]
+
+    def _remember(self, chunk):
+        self._history += chunk
+        overflow = len(self._history) - self.duplicates.max_size
+        if overflow > 0:
+            del self._history[:overflow]
+            self._history_base += overflow
+
+    def _fragment(self, start, end):
+        return bytes(self._history[start - self._history_base:end - self._history_base])
+
+    def close(self):
+        """结束输入并返回分析报告"""
+        self._eof = True
+        self.feed(b"")
+        self._account(self._offset, self._current_category())
+        self._buffer = b""
+        return self.report()
+
+    # ------------------------------------------------------------------
+    # HTML模式：查找plotly.js脚本、边界拓扑脚本和Plotly调用
+    # ------------------------------------------------------------------
+    def _scan_html(self, data, pos, base):
+        candidates = []
+        for marker in (_SCRIPT_OPEN, *PLOTLY_CALLS):
+            idx = data.find(marker, pos)
+            if idx >= 0:
+                candidates.append((idx, marker))
+
+        if not candidates:
+            # 保留可能被截断的标记
+            keep = max(len(m) for m in (_SCRIPT_OPEN, *PLOTLY_CALLS)) - 1
+            return max(pos, len(data) - keep) if len(data) - pos > keep else None
+
+        idx, marker = min(candidates)
+        if marker == _SCRIPT_OPEN:
+            tag_end = data.find(b">", idx)
+            if not self._eof and (tag_end < 0 or len(data) - tag_end < 256):
+                # 需要更多数据判断脚本内容
+                return idx if idx > pos else None
+            if tag_end < 0:
+                return len(data)
+            head = data[tag_end + 1:tag_end + 256]
+            if _TOPOLOGY_SCRIPT_ID in data[idx:tag_end]:
+                self._account(base + tag_end + 1, "html")
+                self._mode, self._script_category = "script", "topology"
+            elif b"plotly.js v" in head or b"plotly.min.js" in head:
+                self._account(base + tag_end + 1, "html")
+                self._mode, self._script_category = "script", "plotlyjs"
+            return tag_end + 1
+
+        self._account(base + idx + len(marker), "html")
+        self.plotly_calls.append(marker[:-1].decode())
+        self._mode = "call"
+        self._call_roots = PLOTLY_CALLS[marker]
+        self._arg_index = 0
+        self._stack = []
+        return idx + len(marker)
+
+    def _scan_script(self, data, pos, base):
+        idx = data.find(_SCRIPT_CLOSE, pos)
+        if idx < 0:
+            keep = len(_SCRIPT_CLOSE) - 1
+            return max(pos, len(data) - keep) if len(data) - pos > keep else None
+        self._account(base + idx, self._script_category)
+        self._mode = "html"
+        return idx
+
+    # ------------------------------------------------------------------
+    # 调用模式：跟踪JSON路径
+    # ------------------------------------------------------------------
+    def _scan_call(self, data, pos, base):
+        for match in _TOKEN_RE.finditer(data, pos):
+            token = match.group()
+            start = base + match.start()
+            end = base + match.end()
+
+            if token in (b'"', b"'"):
+                # 字符串被分块截断，等待更多数据
+                return match.start()
+
+            stack = self._stack
+            if not stack:
+                if token in (b"{", b"["):
+                    category = self._call_roots.get(self._arg_index, "html")
+                    self._account(start, "html")
+                    self._push(token, (category,), category, start)
+                    self._account(end, category)
+                elif token == b",":
+                    self._arg_index += 1
+                elif token == b")":
+                    self._account(end, "html")
+                    self._mode = "html"
+                    return match.end()
+                continue
+
+            top = stack[-1]
+            # 标记之前的数字、空白等属于当前成员
+            self._account(start, top["child_category"])
+
+            if token in (b"{", b"["):
+                category = top["child_category"]
+                self._push(token, top["path"] + (top["key"],), category, start)
+                self._account(end, category)
+            elif token in (b"}", b"]"):
+                self._account(end, top["category"])
+                stack.pop()
+                self._close_container(top, end)
+            elif token == b",":
+                self._account(end, top["category"])
+                if top["open"] == b"[":
+                    top["key"] += 1
+                    top["child_category"] = _classify(top["category"], top["path"] + (top["key"],))
+                else:
+                    top["key"] = None
+                    top["child_category"] = top["category"]
+            elif token == b":":
+                self._account(end, top["category"])
+                top["child_category"] = _classify(top["category"], top["path"] + (top["key"],))
+            elif top["open"] == b"{" and top["key"] is None:
+                top["key"] = token[1:-1].decode("utf-8", errors="replace")
+                self._account(end, top["category"])
+            else:
+                category = top["child_category"]
+                if category == "label_values" and token[:1] in (b'"', b"'"):
+                    category = "hover_text"
+                self._account(end, category)
+
+        return len(data)
+
+    def _push(self, token, path, category, start):
+        is_array = token == b"["
+        self._stack.append({
+            "open": token,
+            "path": path,
+            "category": category,
+            "child_category": _classify(category, path + (0,)) if is_array else category,
+            "key": 0 if is_array else None,
+            "start": start,
+        })
+
+    def _close_container(self, frame, end):
+        path = frame["path"]
+        size = end - frame["start"]
+
+        if len(path) == 2 and path[0] == "frames":
+            self.frame_sizes.append(size)
+
+        if self.duplicates.min_size <= size <= self.duplicates.max_size \
+                and frame["start"] >= self._history_base:
+            pattern = ".".join("*" if isinstance(p, int) else p for p in path)
+            self.duplicates.add(self._fragment(frame["start"], end), pattern)
+
+    # ------------------------------------------------------------------
+    # 报告
+    # ------------------------------------------------------------------
+    def report(self):
+        """生成分析报告"""
+        frame_count = len(self.frame_sizes)
+        frame_bytes = sum(self.frame_sizes)
+        return {
+            "total_bytes": self._offset,
+            "components": dict(self.components),
+            "plotly_calls": list(self.plotly_calls),
+            "frames": {
+                "count": frame_count,
+                "total_bytes": frame_bytes,
+                "avg_bytes": frame_bytes / frame_count if frame_count else 0,
+                "max_bytes": max(self.frame_sizes) if frame_count else 0,
+            },
+            "duplicate_hot_spots": self.duplicates.hot_spots(self.top_n),
+        }
+
+
+def analyze_html(file_path, chunk_size=1024 * 1024, **kwargs):
+    """流式分析HTML文件，不会一次性读入整个文件"""
+    analyzer = HtmlSizeAnalyzer(**kwargs)
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            analyzer.feed(chunk)
+    return analyzer.close()
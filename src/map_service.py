@@ -0,0 +1,368 @@
+"""地图渲染服务模块 - 常驻数据，按请求参数生成图形JSON并缓存响应"""
+import os
+import json
+import hashlib
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+from plotly.offline import get_plotlyjs_version
+
+from .data_loader import load_wind_data, select_time_range, parse_time_bound
+from .geojson_processor import load_geojson, create_district_adcode_map, build_topology
+from .fast_figure import build_figure_dict, dumps
+from .utils import copy_config
+
+logger = logging.getLogger(__name__)
+
+MAP_STYLES = ["open-street-map", "carto-positron", "carto-darkmatter", "white-bg"]
+
+INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8" />
+<script src="https://cdn.plot.ly/plotly-{version}.min.js"></script>
+</head>
+<body>
+<div id="map" style="height: 800px"></div>
+<script>
+fetch("/figure" + window.location.search)
+    .then(function(response) {{ return response.json(); }})
+    .then(function(fig) {{
+        return Plotly.newPlot("map", fig.data, fig.layout).then(function() {{
+            return Plotly.addFrames("map", fig.frames || []);
+        }});
+    }});
+</script>
+</body>
+</html>
+"""
+
+class CachedResponse:
+    """缓存的响应体及其ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+class ResponseCache:
+    """按字节数限制大小的LRU缓存（线程安全）"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def peek(self, key):
+        """查找缓存但不计入命中统计"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, entry):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            # 单个响应超过缓存容量，不缓存
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old.body)
+            self._entries[key] = entry
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted.body)
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0
+            }
+
+class MapService:
+    """常驻几何和风速数据，按 (区域, 时间范围, 分辨率, 样式, 数据版本) 生成并缓存图形JSON"""
+
+    def __init__(self, config, cache_max_bytes=256 * 1024 * 1024, reload_check_interval=5.0, workers=8):
+        self.config = config
+        self.cache = ResponseCache(cache_max_bytes)
+        self.reload_check_interval = reload_check_interval
+        # 构建图形占用CPU，用固定大小的线程池限制并发构建数；连接本身由服务器的线程处理
+        self._build_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="map-build")
+        self._data_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._last_check = 0.0
+        self.version = None
+        self.reload()
+
+    # ------------------------------------------------------------------
+    # 数据
+    # ------------------------------------------------------------------
+    def _data_files(self):
+        return [self.config.GEOJSON_PATH] + list(self.config.DISTRICT_FILES.values())
+
+    def compute_data_version(self):
+        """根据数据文件的修改时间和大小计算数据版本"""
+        digest = hashlib.blake2b(digest_size=8)
+        for path in self._data_files():
+            try:
+                stat = os.stat(path)
+                digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size};".encode('utf-8'))
+            except OSError:
+                digest.update(f"{path}:missing;".encode('utf-8'))
+        return digest.hexdigest()
+
+    def reload(self):
+        """重新加载几何和风速数据"""
+        with self._reload_lock:
+            self._load()
+
+    def _load(self):
+        """在锁外加载数据，完成后一次性替换，加载期间请求继续使用旧数据"""
+        version = self.compute_data_version()
+        logger.info(f"Loading service data, version {version}")
+        geojson = load_geojson(self.config.GEOJSON_PATH)
+        wind_df = load_wind_data(self.config.DISTRICT_FILES, geojson, self.config)
+        district_adcode_map = create_district_adcode_map(geojson)
+
+        with self._data_lock:
+            self.geojson = geojson
+            self.wind_df = wind_df
+            self.district_adcode_map = district_adcode_map
+            # 按区域缓存边界拓扑，每个区域组合只构建一次
+            self.topologies = {}
+            self.version = version
+        self._last_check = time.monotonic()
+
+    def _ensure_fresh(self):
+        """定期检查数据文件是否变化，变化时重新加载（同一时间只有一个线程检查和加载）"""
+        if time.monotonic() - self._last_check < self.reload_check_interval:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            # 其他线程正在检查或加载，本次请求使用当前数据
+            return
+        try:
+            if time.monotonic() - self._last_check < self.reload_check_interval:
+                return
+            self._last_check = time.monotonic()
+            if self.compute_data_version() != self.version:
+                self._load()
+        finally:
+            self._reload_lock.release()
+
+    def _snapshot(self):
+        """同时取得数据版本和对应的数据"""
+        with self._data_lock:
+            return self.version, self.wind_df, self.geojson, self.district_adcode_map, self.topologies
+
+    # ------------------------------------------------------------------
+    # 请求
+    # ------------------------------------------------------------------
+    def parse_params(self, query):
+        """解析并规范化请求参数，参数无效时抛出ValueError"""
+        def first(name):
+            values = query.get(name)
+            return values[0].strip() if values and values[0].strip() else None
+
+        region = first("region")
+        if region is None or region == "all":
+            districts = ()
+        else:
+            districts = tuple(sorted(set(name.strip() for name in region.split(",") if name.strip())))
+            unknown = [name for name in districts if name not in self.district_adcode_map]
+            if unknown:
+                raise ValueError(f"Unknown region: {', '.join(unknown)}")
+
+        start = parse_time_bound(first("start"))
+        end = parse_time_bound(first("end"), end_of_day=True)
+
+        resolution = first("resolution")
+        if resolution is not None:
+            offset = pd.tseries.frequencies.to_offset(resolution)
+            if isinstance(offset, pd.offsets.Tick):
+                # 规范化固定时长的写法，使 180min 与 3h 共用缓存
+                offset = pd.tseries.frequencies.to_offset(pd.Timedelta(offset))
+            resolution = offset.freqstr
+
+        style = first("style") or self.config.VISUALIZATION_SETTINGS["map_style"]
+        if style not in MAP_STYLES:
+            raise ValueError(f"Unknown style: {style}")
+
+        return {
+            "region": districts,
+            "start": start.isoformat() if start is not None else None,
+            "end": end.isoformat() if end is not None else None,
+            "resolution": resolution,
+            "style": style
+        }
+
+    def render(self, params):
+        """返回 (CachedResponse, 是否命中缓存)"""
+        self._ensure_fresh()
+        data = self._snapshot()
+        key = (params["region"], params["start"], params["end"], params["resolution"], params["style"], data[0])
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry, True
+
+        # 相同参数的并发请求只构建一次
+        with self._inflight_lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                # 等待期间其他线程可能已完成构建（仍按未命中统计）
+                entry = self.cache.peek(key)
+                if entry is not None:
+                    return entry, False
+                entry = CachedResponse(self._build_pool.submit(self._build, params, data).result())
+                self.cache.put(key, entry)
+                return entry, False
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _build(self, params, data):
+        """按请求参数和数据快照构建图形JSON"""
+        _, df, geojson, district_adcode_map, topologies = data
+        df = select_time_range(df, parse_time_bound(params["start"]), parse_time_bound(params["end"]))
+
+        if params["region"]:
+            adcodes = {district_adcode_map[name] for name in params["region"]}
+            df = df[df['adcode'].isin(adcodes)]
+            geojson = dict(geojson, features=[
+                feature for feature in geojson['features']
+                if feature['properties'].get('adcode') in adcodes
+            ])
+
+        if params["resolution"]:
+            df = resample_wind_data(df, params["resolution"])
+
+        topology = topologies.get(params["region"])
+        if topology is None:
+            topology = build_topology(geojson, self.config.VISUALIZATION_SETTINGS["topology_quantization"])
+            topologies[params["region"]] = topology
+
+        config = copy_config(self.config, VISUALIZATION_SETTINGS={"map_style": params["style"]})
+        figure = build_figure_dict(df.reset_index(drop=True), geojson, config, topology)
+        return dumps(figure)
+
+    def stats(self):
+        return dict(self.cache.stats(), data_version=self.version, records=len(self.wind_df))
+
+    def close(self):
+        self._build_pool.shutdown(wait=False)
+
+def resample_wind_data(df, resolution):
+    """将风速数据按时间分辨率聚合（取平均值）"""
+    if df.empty:
+        return df
+    resampled = (
+        df.groupby(['district', 'adcode', pd.Grouper(key='datetime', freq=resolution)], sort=False)['wind_speed']
+        .mean()
+        .dropna()
+        .reset_index()
+    )
+    resampled = resampled[['datetime', 'district', 'adcode', 'wind_speed']]
+    return resampled.sort_values('datetime', kind='stable', ignore_index=True)
+
+class MapRequestHandler(BaseHTTPRequestHandler):
+    """处理地图服务的HTTP请求"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # 空闲的持久连接超过keepalive_timeout后关闭，释放处理线程
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        service = self.server.service
+
+        if url.path == "/figure":
+            try:
+                params = service.parse_params(parse_qs(url.query))
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                entry, hit = service.render(params)
+            except Exception as e:
+                logger.exception(f"Error rendering figure for {params}")
+                self._send_json(500, {"error": str(e)})
+                return
+
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": "HIT" if hit else "MISS"}
+            if entry.etag in self._if_none_match():
+                self._send(304, b"", headers=headers)
+            else:
+                self._send(200, entry.body, "application/json", headers)
+        elif url.path == "/stats":
+            self._send_json(200, service.stats())
+        elif url.path == "/":
+            body = INDEX_HTML.format(version=get_plotlyjs_version()).encode('utf-8')
+            self._send(200, body, "text/html; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _if_none_match(self):
+        header = self.headers.get("If-None-Match", "")
+        return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), "application/json")
+
+    def _send(self, status, body, content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+class MapServer(ThreadingHTTPServer):
+    """每个连接一个线程的HTTP服务器
+
+    空闲的持久连接只占用一个等待中的线程，不会阻塞其他请求；
+    图形构建的并发数由MapService的线程池限制。
+    """
+
+    def __init__(self, server_address, service, keepalive_timeout=15.0):
+        super().__init__(server_address, MapRequestHandler)
+        self.service = service
+        self.keepalive_timeout = keepalive_timeout
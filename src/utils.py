@@ -2,6 +2,7 @@
 import re
 import logging
 from datetime import datetime
+from types import SimpleNamespace
 
 # 设置日志
 logging.basicConfig(
@@ -20,4 +21,16 @@ def setup_logging(verbose=False):
     logging.basicConfig(
         level=level,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
\ No newline at end of file
+    )
+
+def copy_config(config, **overrides):
+    """复制配置中的所有设置（大写名称），overrides中的设置字典与原有设置合并，其他值直接替换
+
+    例如 copy_config(config, VISUALIZATION_SETTINGS={"map_style": "white-bg"})
+    """
+    settings = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+    for name, value in overrides.items():
+        if isinstance(value, dict) and isinstance(settings.get(name), dict):
+            value = dict(settings[name], **value)
+        settings[name] = value
+    return SimpleNamespace(**settings)
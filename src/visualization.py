@@ -1,12 +1,38 @@
 """可视化模块"""
+import json
 import plotly.graph_objects as go
 import numpy as np
 import logging
 
+from .analytics import evaluate_rules, combine_alerts, summarize_alerts
+from .data_loader import QUALITY_INTERPOLATED, QUALITY_FILLED, QUALITY_MISSING, QUALITY_SHIFTED, QUALITY_NAMES
+
 logger = logging.getLogger(__name__)
 
-def create_wind_visualization(df, geojson, config):
-    """创建风速可视化（使用等值线图）"""
+# 拓扑嵌入时geojson和边界线图层在HTML中的占位符
+TOPOLOGY_FEATURES_PLACEHOLDER = "__TOPOLOGY_FEATURES__"
+TOPOLOGY_MESH_PLACEHOLDER = "__TOPOLOGY_MESH__"
+
+# 有告警的时间点在滑块标签前加的标记
+ALERT_LABEL_PREFIX = "⚠ "
+
+# 悬停信息中按数据质量标记附加的说明（观测值和缺测不附加）
+QUALITY_HOVER_NOTES = {
+    QUALITY_INTERPOLATED: "<br>Interpolated",
+    QUALITY_FILLED: "<br>Forward filled",
+    QUALITY_SHIFTED: "<br>Shifted to time axis"
+}
+
+# 风速标签的格式；没有数值（未填补的缺测）的区域显示MISSING_LABEL
+# （填充层在z为null时没有颜色和悬停信息，且plotly.js会把null格式化为0）
+LABEL_TEMPLATE = '%{text:.1f} m/s'
+MISSING_LABEL = "No data"
+
+def create_wind_visualization(df, geojson, config, template_only=False, topology=None):
+    """创建风速可视化（使用等值线图），template_only时只生成第一个时间点的步骤和帧
+
+    topology为build_topology对geojson的结果，为None时在此构建
+    """
     if df.empty:
         logger.error("No data available for visualization")
         return go.Figure()
@@ -23,25 +49,42 @@ def create_wind_visualization(df, geojson, config):
     logger.info(f"Wind speed range: {min_wind:.2f} - {max_wind:.2f} m/s")
     
     # 获取区域中心点
-    from .geojson_processor import get_adcode_centroids
+    from .geojson_processor import get_adcode_centroids, build_topology, topology_to_mesh
     adcode_centroids = get_adcode_centroids(geojson)
     
+    # 边界线图层直接由共享弧段绘制，公共边界只出现一次
+    if topology is None:
+        topology = build_topology(geojson, config.VISUALIZATION_SETTINGS["topology_quantization"])
+    outline_geojson = topology_to_mesh(topology)
+    
+    # 构建时间×区域风速矩阵，区域顺序在所有帧中保持一致
+    districts, wind_matrix = build_wind_matrix(df, unique_times)
+    
     # 添加初始数据（第一小时）
-    initial_data = df[df['datetime'] == unique_times[0]]
+    initial_values = wind_matrix[0]
     
-    if initial_data.empty:
+    if np.isnan(initial_values).all():
         logger.error(f"No data for first time point {unique_times[0]}")
         return go.Figure()
     
-    logger.debug(f"Initial data districts: {initial_data['district'].unique()}")
+    logger.debug(f"Initial data districts: {districts['district'].tolist()}")
+    
+    # 阈值告警：告警区域以标记高亮，有告警的时间点在滑块标签中标出
+    alerts = detect_alerts(wind_matrix, unique_times, config)
+    log_alerts(alerts, unique_times, districts['district'].tolist())
+    alert_sizes = alert_marker_sizes(alerts, wind_matrix.shape, config)
+    
+    # 数据质量：插值或填补的数值在悬停信息中注明
+    quality_notes = build_quality_notes(df, unique_times, districts)
     
     fig = go.Figure()
     
     # 添加区域填充层 - 使用adcode作为唯一标识符
+    # 区名只作为customdata发送一次，悬停文本由hovertemplate在浏览器端格式化
     fig.add_trace(go.Choroplethmapbox(
         geojson=geojson,
-        locations=initial_data['adcode'],
-        z=initial_data['wind_speed'],
+        locations=districts['adcode'],
+        z=initial_values,
         featureidkey="properties.adcode",  # 关键修改：使用adcode作为标识符
         colorscale=config.VISUALIZATION_SETTINGS["colorscale"],
         zmin=min_wind,
@@ -49,8 +92,13 @@ def create_wind_visualization(df, geojson, config):
         marker_opacity=config.VISUALIZATION_SETTINGS["opacity"],
         marker_line_width=config.VISUALIZATION_SETTINGS["line_width"],
         marker_line_color=config.VISUALIZATION_SETTINGS["line_color"],
-        text=initial_data['district'] + '<br>Wind Speed: ' + initial_data['wind_speed'].round(2).astype(str) + ' m/s',
-        hoverinfo='text',
+        customdata=districts['district'],
+        text=quality_notes[0] if quality_notes is not None else None,
+        hovertemplate=(
+            '%{customdata}<br>Wind Speed: %{z:.2f} m/s'
+            + ('%{text}' if quality_notes is not None else '')
+            + '<extra></extra>'
+        ),
         name='Wind Speed',
         colorbar=dict(
             title='Wind Speed (m/s)',
@@ -60,25 +108,36 @@ def create_wind_visualization(df, geojson, config):
         )
     ))
     
-    # 添加风速文本层
-    initial_lons = []
-    initial_lats = []
-    initial_texts = []
+    # 区域中心点，标签和告警标记位置固定
+    label_lons = []
+    label_lats = []
+    for adcode in districts['adcode']:
+        lon, lat = adcode_centroids.get(adcode, (None, None))
+        label_lons.append(lon)
+        label_lats.append(lat)
     
-    for _, row in initial_data.iterrows():
-        adcode = row['adcode']
-        centroid = adcode_centroids.get(adcode)
-        if centroid:
-            lon, lat = centroid
-            initial_lons.append(lon)
-            initial_lats.append(lat)
-            initial_texts.append(f"{row['wind_speed']:.1f} m/s")
+    # 添加告警标记层 - 位于文本层下方，标记大小随时间变化（无告警时为0）
+    if alert_sizes is not None:
+        fig.add_trace(go.Scattermapbox(
+            lon=label_lons,
+            lat=label_lats,
+            mode='markers',
+            marker=dict(
+                size=alert_sizes[0],
+                color=config.ALERT_SETTINGS["marker_color"]
+            ),
+            hoverinfo='skip',
+            name='Alert',
+            showlegend=False
+        ))
     
+    # 添加风速文本层 - 只有数值随时间变化
     fig.add_trace(go.Scattermapbox(
-        lon=initial_lons,
-        lat=initial_lats,
+        lon=label_lons,
+        lat=label_lats,
         mode='text',
-        text=initial_texts,
+        text=initial_values,
+        texttemplate=label_template(initial_values),
         textfont=dict(
             size=config.VISUALIZATION_SETTINGS["text_font_size"],
             color=config.VISUALIZATION_SETTINGS["text_font_color"],
@@ -88,8 +147,11 @@ def create_wind_visualization(df, geojson, config):
         showlegend=False
     ))
     
+    # 快速构建路径只需要第一个时间点的步骤和帧作为模板
+    frame_times = unique_times[:1] if template_only else unique_times
+    
     # 创建时间滑块
-    steps = create_slider_steps(df, unique_times, adcode_centroids)
+    steps = create_slider_steps(frame_times, wind_matrix, alert_sizes, quality_notes)
     sliders = [dict(
         active=0,
         currentvalue={
@@ -108,49 +170,121 @@ def create_wind_visualization(df, geojson, config):
     updatemenus = create_playback_buttons()
     
     # 创建动画帧
-    frames = create_animation_frames(df, unique_times, adcode_centroids, config, min_wind, max_wind, steps)
+    frames = create_animation_frames(
+        frame_times, wind_matrix, config, min_wind, max_wind, alert_sizes, quality_notes
+    )
     fig.frames = frames
     
     # 设置地图布局
-    setup_map_layout(fig, geojson, config, sliders, updatemenus, df, unique_times)
+    setup_map_layout(fig, outline_geojson, config, sliders, updatemenus, df, unique_times)
     
     return fig
 
-def create_slider_steps(df, unique_times, adcode_centroids):
+def build_wind_matrix(df, unique_times):
+    """构建时间×区域风速矩阵（区域按首次出现排序，缺失值为NaN）"""
+    districts = df.drop_duplicates('adcode')[['adcode', 'district']].reset_index(drop=True)
+    matrix = df.pivot_table(index='datetime', columns='adcode', values='wind_speed')
+    matrix = matrix.reindex(index=unique_times, columns=districts['adcode'])
+    # 按行连续存储，每个时间点的数据是一段连续内存
+    return districts, np.ascontiguousarray(matrix.to_numpy())
+
+def build_quality_notes(df, unique_times, districts):
+    """构建每个时间点的悬停说明，数据没有quality列或没有需要说明的数值时返回None
+
+    有说明的时间点为每个区域一个字符串的数组，其余时间点为空字符串（不在每帧中重复N个空值）。
+    """
+    if 'quality' not in df.columns:
+        return None
+    quality = df.pivot_table(index='datetime', columns='adcode', values='quality', aggfunc='max')
+    quality = quality.reindex(index=unique_times, columns=districts['adcode'])
+    quality = quality.fillna(QUALITY_MISSING).to_numpy(dtype=int)
+    if not np.isin(quality, list(QUALITY_HOVER_NOTES)).any():
+        return None
+    
+    notes = np.array([QUALITY_HOVER_NOTES.get(code, "") for code in range(max(QUALITY_NAMES) + 1)], dtype=object)
+    annotated = np.isin(quality, list(QUALITY_HOVER_NOTES)).any(axis=1)
+    return [notes[row] if has_notes else "" for row, has_notes in zip(quality, annotated)]
+
+def infer_step_hours(unique_times):
+    """时间轴的步长（小时），取相邻时间点间隔的中位数"""
+    if len(unique_times) < 2:
+        return 1
+    return float(np.median(np.diff(np.asarray(unique_times, dtype='datetime64[s]')).astype(float))) / 3600
+
+def detect_alerts(wind_matrix, unique_times, config):
+    """按ALERT_SETTINGS评估告警规则，返回 {规则名: 时间×区域布尔矩阵}，未启用时为空"""
+    settings = config.ALERT_SETTINGS
+    if not settings["enabled"] or not settings["rules"]:
+        return {}
+    return evaluate_rules(wind_matrix, settings["rules"], infer_step_hours(unique_times))
+
+def log_alerts(alerts, unique_times, district_names):
+    """在日志中输出告警汇总（每条规则的事件数和区域数），事件明细为DEBUG级别"""
+    events = summarize_alerts(alerts, unique_times, district_names)
+    if events:
+        summary = {}
+        for event in events:
+            rule = summary.setdefault(event["rule"], {"events": 0, "districts": set()})
+            rule["events"] += 1
+            rule["districts"].add(event["district"])
+        logger.info(f"{len(events)} alert events detected: " + ", ".join(
+            f"{name} {rule['events']} events in {len(rule['districts'])} districts" for name, rule in summary.items()
+        ))
+    for event in events:
+        logger.debug(
+            f"Alert [{event['rule']}] {event['district']}: "
+            f"{event['start'].strftime('%Y-%m-%d %H:%M')} - {event['end'].strftime('%Y-%m-%d %H:%M')} "
+            f"({event['steps']} steps)"
+        )
+
+def alert_marker_sizes(alerts, shape, config):
+    """告警标记的大小矩阵（告警区域为marker_size，其余为0），未启用告警时返回None"""
+    if not config.ALERT_SETTINGS["enabled"] or not config.ALERT_SETTINGS["rules"]:
+        return None
+    return np.where(combine_alerts(alerts, shape), config.ALERT_SETTINGS["marker_size"], 0)
+
+def step_label(time_point, sizes=None):
+    """滑块标签，有告警的时间点加上标记"""
+    label = time_point.strftime('%m-%d %H:%M')
+    if sizes is not None and sizes.any():
+        return ALERT_LABEL_PREFIX + label
+    return label
+
+def label_template(values):
+    """一个时间点的标签格式：没有缺失值时为单个格式字符串，否则为每个区域一个（缺失处为MISSING_LABEL）
+
+    每个步骤和帧都带上格式，使上一个时间点的逐区域格式不会残留。
+    """
+    missing = np.isnan(values)
+    if not missing.any():
+        return LABEL_TEMPLATE
+    return np.where(missing, MISSING_LABEL, LABEL_TEMPLATE).astype(object)
+
+def slider_step_args(values, sizes=None, notes=None):
+    """滑块步骤的update参数：填充层更新z（和数据质量说明），文本层更新数值标签，告警层更新标记大小"""
+    if sizes is None:
+        return [{'z': [values, None], 'text': [notes, values], 'texttemplate': [None, label_template(values)]}, {}]
+    return [{
+        'z': [values, None, None],
+        'marker.size': [None, sizes, None],
+        'text': [notes, None, values],
+        'texttemplate': [None, None, label_template(values)]
+    }, {}]
+
+def create_slider_steps(unique_times, wind_matrix, alert_sizes=None, quality_notes=None):
     """创建时间滑块步骤"""
     steps = []
     
     for i, time_point in enumerate(unique_times):
-        # 获取当前时间点的数据
-        current_data = df[df['datetime'] == time_point]
-        
-        # 准备文本数据
-        text_lons = []
-        text_lats = []
-        text_values = []
-        
-        for _, row in current_data.iterrows():
-            adcode = row['adcode']
-            centroid = adcode_centroids.get(adcode)
-            if centroid:
-                lon, lat = centroid
-                text_lons.append(lon)
-                text_lats.append(lat)
-                text_values.append(f"{row['wind_speed']:.1f} m/s")
+        values = wind_matrix[i]
+        sizes = alert_sizes[i] if alert_sizes is not None else None
+        notes = quality_notes[i] if quality_notes is not None else None
         
         # 创建滑块步长
         step = dict(
             method='update',
-            args=[{
-                'z': [current_data['wind_speed']],
-                'locations': [current_data['adcode']],
-                'text': [current_data['district'] + '<br>Wind Speed: ' + current_data['wind_speed'].round(2).astype(str) + ' m/s']
-            }, {
-                'lon': [text_lons],
-                'lat': [text_lats],
-                'text': [text_values]
-            }],
-            label=time_point.strftime('%m-%d %H:%M')
+            args=slider_step_args(values, sizes, notes),
+            label=step_label(time_point, sizes)
         )
         steps.append(step)
     
@@ -197,36 +331,20 @@ def create_playback_buttons():
         )
     ]
 
-def create_animation_frames(df, unique_times, adcode_centroids, config, min_wind, max_wind, steps):
+def create_animation_frames(unique_times, wind_matrix, config, min_wind, max_wind, alert_sizes=None, quality_notes=None):
     """创建动画帧"""
     frames = []
     
     for i, time_point in enumerate(unique_times):
-        current_data = df[df['datetime'] == time_point]
-        if not current_data.empty:
+        values = wind_matrix[i]
+        if not np.isnan(values).all():
             # 创建包含时间信息的帧名称
             frame_name = time_point.strftime('%Y-%m-%d %H:%M')
             
-            # 准备文本数据
-            text_lons = []
-            text_lats = []
-            text_values = []
-            
-            for _, row in current_data.iterrows():
-                adcode = row['adcode']
-                centroid = adcode_centroids.get(adcode)
-                if centroid:
-                    lon, lat = centroid
-                    text_lons.append(lon)
-                    text_lats.append(lat)
-                    text_values.append(f"{row['wind_speed']:.1f} m/s")
-            
-            # 创建填充层
+            # 创建填充层（区域顺序与初始轨迹一致，区名沿用初始轨迹的customdata）
             choropleth_trace = go.Choroplethmapbox(
-                z=current_data['wind_speed'],
-                locations=current_data['adcode'],
-                text=current_data['district'] + '<br>Wind Speed: ' + current_data['wind_speed'].round(2).astype(str) + ' m/s',
-                featureidkey="properties.adcode",
+                z=values,
+                text=quality_notes[i] if quality_notes is not None else None,
                 colorscale=config.VISUALIZATION_SETTINGS["colorscale"],
                 zmin=min_wind,
                 zmax=max_wind,
@@ -236,36 +354,25 @@ def create_animation_frames(df, unique_times, adcode_centroids, config, min_wind
                 showscale=False
             )
             
-            # 创建文本层
+            # 创建文本层（位置沿用初始轨迹，只更新数值和缺失值处的标签格式）
             text_trace = go.Scattermapbox(
-                lon=text_lons,
-                lat=text_lats,
-                mode='text',
-                text=text_values,
-                textfont=dict(
-                    size=config.VISUALIZATION_SETTINGS["text_font_size"],
-                    color=config.VISUALIZATION_SETTINGS["text_font_color"],
-                    family=config.VISUALIZATION_SETTINGS["text_font_family"]
-                ),
-                hoverinfo='none',
-                showlegend=False
+                text=values,
+                texttemplate=label_template(values)
             )
             
+            data = [choropleth_trace, text_trace]
+            if alert_sizes is not None:
+                # 告警层（位置和颜色沿用初始轨迹，只更新标记大小）
+                data.insert(1, go.Scattermapbox(marker=dict(size=alert_sizes[i])))
+            
             frames.append(
                 go.Frame(
-                    data=[choropleth_trace, text_trace],
+                    data=data,
                     name=frame_name,
                     layout=dict(
-                        # 添加时间滑块到帧
-                        sliders=[dict(
-                            active=i,
-                            steps=steps,
-                            currentvalue={
-                                "prefix": "Time: ",
-                                "font": {"size": 14, "color": "#333"},
-                                "xanchor": "right"
-                            }
-                        )]
+                        # 只更新滑块位置，plotly按索引将其合并到已有的滑块中，
+                        # 无需在每一帧中重复全部步骤
+                        sliders=[dict(active=i)]
                     )
                 )
             )
@@ -276,7 +383,7 @@ def create_animation_frames(df, unique_times, adcode_centroids, config, min_wind
     
     return frames
 
-def setup_map_layout(fig, geojson, config, sliders, updatemenus, df, unique_times):
+def setup_map_layout(fig, outline_geojson, config, sliders, updatemenus, df, unique_times):
     """设置地图布局"""
     fig.update_layout(
         title={
@@ -296,7 +403,7 @@ def setup_map_layout(fig, geojson, config, sliders, updatemenus, df, unique_time
             zoom=config.VISUALIZATION_SETTINGS["map_zoom"],
             center=config.VISUALIZATION_SETTINGS["map_center"],
             layers=[{
-                "source": geojson,
+                "source": outline_geojson,
                 "type": "line",
                 "color": "rgba(100, 100, 100, 0.5)",
                 "line": {"width": 1}
@@ -346,4 +453,52 @@ def setup_map_layout(fig, geojson, config, sliders, updatemenus, df, unique_time
         bordercolor="#AAA",
         borderwidth=1,
         borderpad=4
-    )
\ No newline at end of file
+    )
+
+def embed_topology(html, topology, object_name="districts"):
+    """将HTML中的边界占位符替换为浏览器端的拓扑解码调用"""
+    from .geojson_processor import TOPOLOGY_DECODER_JS
+    
+    html = html.replace(
+        json.dumps(TOPOLOGY_FEATURES_PLACEHOLDER),
+        f"topologyFeatures(window.districtTopology, {json.dumps(object_name)})"
+    ).replace(json.dumps(TOPOLOGY_MESH_PLACEHOLDER), "topologyMesh(window.districtTopology)")
+    
+    topology_script = (
+        '<script type="text/javascript" id="district-topology">'
+        + TOPOLOGY_DECODER_JS
+        + "window.districtTopology = " + json.dumps(topology, separators=(',', ':')) + ";"
+        + "</script>"
+    )
+    if "<body>" in html:
+        return html.replace("<body>", "<body>\n" + topology_script, 1)
+    return topology_script + html
+
+def write_html_with_topology(fig, file_path, topology, object_name="districts", **kwargs):
+    """保存HTML文件，边界数据以拓扑编码嵌入并在浏览器端解码"""
+    # 填充层geojson和边界线图层临时替换为占位符，生成HTML后恢复
+    geojson_traces = [trace for trace in fig.data if getattr(trace, 'geojson', None) is not None]
+    original_geojsons = [trace.geojson for trace in geojson_traces]
+    original_layers = fig.layout.mapbox.layers
+    try:
+        for trace in geojson_traces:
+            trace.geojson = TOPOLOGY_FEATURES_PLACEHOLDER
+        
+        layers = []
+        for layer in original_layers:
+            layer = go.layout.mapbox.Layer(layer)
+            if layer.type == "line":
+                layer.source = TOPOLOGY_MESH_PLACEHOLDER
+            layers.append(layer)
+        fig.layout.mapbox.layers = layers
+        
+        html = fig.to_html(**kwargs)
+    finally:
+        for trace, original in zip(geojson_traces, original_geojsons):
+            trace.geojson = original
+        fig.layout.mapbox.layers = original_layers
+    
+    html = embed_topology(html, topology, object_name)
+    
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(html)
@@ -0,0 +1,82 @@
+"""滚动统计和告警规则的测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics import (
+    rolling_statistics,
+    evaluate_rules,
+    combine_alerts,
+    summarize_alerts,
+    RollingStatistics,
+    AlertEngine
+)
+
+def random_matrix(n_times, n_districts, missing=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = np.abs(rng.normal(5, 3, (n_times, n_districts)))
+    matrix[rng.random(matrix.shape) < missing] = np.nan
+    return matrix
+
+@pytest.mark.parametrize("window", [1, 2, 3, 6, 7, 24, 100])
+@pytest.mark.parametrize("missing", [0.0, 0.2, 0.9])
+def test_rolling_statistics_match_pandas(window, missing):
+    matrix = random_matrix(50, 4, missing)
+    rolling = pd.DataFrame(matrix).rolling(window, min_periods=1)
+
+    mean, maximum = rolling_statistics(matrix, window)
+
+    np.testing.assert_allclose(mean, rolling.mean().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(maximum, rolling.max().to_numpy(), equal_nan=True)
+
+@pytest.mark.parametrize("window", [1, 3, 6, 24])
+def test_incremental_matches_batch(window):
+    matrix = random_matrix(120, 5, missing=0.1, seed=1)
+    batch_mean, batch_max = rolling_statistics(matrix, window)
+
+    stats = RollingStatistics(matrix.shape[1], window)
+    results = [stats.update(row) for row in matrix]
+
+    np.testing.assert_allclose(np.array([r[0] for r in results]), batch_mean, equal_nan=True)
+    np.testing.assert_allclose(np.array([r[1] for r in results]), batch_max, equal_nan=True)
+
+RULES = [
+    {"name": "sustained", "statistic": "value", "threshold": 8.0, "duration_hours": 3},
+    {"name": "mean", "statistic": "mean", "window_hours": 6, "threshold": 6.0},
+    {"name": "calm", "statistic": "max", "window_hours": 4, "operator": "<", "threshold": 3.0, "duration_hours": 2}
+]
+
+@pytest.mark.parametrize("step_hours", [1, 3])
+def test_alert_engine_matches_evaluate_rules(step_hours):
+    matrix = random_matrix(200, 6, missing=0.05, seed=2)
+    batch = evaluate_rules(matrix, RULES, step_hours)
+
+    engine = AlertEngine(RULES, matrix.shape[1], step_hours)
+    updates = [engine.update(row) for row in matrix]
+
+    for rule in RULES:
+        np.testing.assert_array_equal(np.array([u[rule["name"]] for u in updates]), batch[rule["name"]])
+
+def test_duration_requires_consecutive_steps():
+    matrix = np.array([[9, 9, 1, 9, 9, 9, 9]], dtype=float).T
+    alerts = evaluate_rules(matrix, RULES[:1])
+    assert alerts["sustained"][:, 0].tolist() == [False, False, False, False, False, True, True]
+
+def test_summarize_alerts():
+    times = pd.date_range("2025-04-12", periods=6, freq="h")
+    alerts = {
+        "a": np.array([[1, 0], [1, 0], [0, 1], [1, 1], [0, 1], [0, 0]], dtype=bool),
+        "b": np.zeros((6, 2), dtype=bool)
+    }
+    events = summarize_alerts(alerts, times, ["东城", "海淀"])
+
+    assert [(e["rule"], e["district"], e["start"], e["end"], e["steps"]) for e in events] == [
+        ("a", "东城", times[0], times[1], 2),
+        ("a", "海淀", times[2], times[4], 3),
+        ("a", "东城", times[3], times[3], 1)
+    ]
+    assert combine_alerts(alerts, (6, 2)).sum() == 6
+
+def test_invalid_rule_raises_value_error():
+    with pytest.raises(ValueError):
+        evaluate_rules(np.ones((3, 1)), [{"name": "x", "statistic": "median", "threshold": 1}])
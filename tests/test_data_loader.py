@@ -0,0 +1,91 @@
+"""按时间范围加载（二分查找定位窗口）的测试"""
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_archive import write_archive
+from src.data_loader import load_wind_data, read_time_window, select_time_range, parse_time_bound
+from src.geojson_processor import load_geojson
+from src.utils import copy_config
+import config.settings as config
+
+DISTRICTS = ["东城", "海淀"]
+
+@pytest.fixture(scope="module")
+def geojson():
+    return load_geojson(config.GEOJSON_PATH)
+
+@pytest.fixture
+def raw_config():
+    """不做时间轴规整的配置，便于直接比较读取结果"""
+    return copy_config(config, DATA_PROCESSING_SETTINGS={"regularize_time_axis": False})
+
+def normalized(df):
+    return df.sort_values(['district', 'datetime'], ignore_index=True)
+
+@pytest.mark.parametrize("start, end", [
+    ("2025-04-12 06:00", "2025-04-13 23:00"),
+    ("2025-04-12 06:30", "2025-04-12 09:30"),    # 边界落在两行之间
+    (None, "2025-04-11 05:00"),
+    ("2025-04-14 20:00", None),
+    ("2025-04-10 00:00", "2025-04-10 00:00"),    # 第一行
+    ("2025-04-14 23:00", "2025-04-14 23:00"),    # 最后一行
+    ("2025-03-01", "2025-03-02"),                # 早于全部数据
+    ("2025-05-01", "2025-05-02"),                # 晚于全部数据
+])
+def test_window_matches_full_load(tmp_path, geojson, raw_config, start, end):
+    times = pd.date_range("2025-04-10", "2025-04-14 23:00", freq="h")
+    district_files = write_archive(tmp_path, DISTRICTS, times)
+
+    full = load_wind_data(district_files, geojson, raw_config)
+    expected = select_time_range(full, parse_time_bound(start), parse_time_bound(end, end_of_day=True))
+    window = load_wind_data(district_files, geojson, raw_config, start=start, end=end)
+
+    if expected.empty:
+        assert window.empty
+    else:
+        pd.testing.assert_frame_equal(normalized(window), normalized(expected))
+
+def test_window_reads_only_requested_rows(tmp_path):
+    times = pd.date_range("2025-04-10", periods=500, freq="h")
+    path = write_archive(tmp_path, DISTRICTS, times)["东城"]
+
+    buffer = read_time_window(path, 9, "gbk", pd.Timestamp("2025-04-12 06:00"), pd.Timestamp("2025-04-12 08:00"))
+    lines = buffer.getvalue().decode("gbk").splitlines()
+
+    assert lines[0] == "日期,时间,地面风速m/s"
+    assert [line[:19] for line in lines[1:]] == [
+        "2025-04-12,06:00:00", "2025-04-12,07:00:00", "2025-04-12,08:00:00"
+    ]
+
+@pytest.mark.parametrize("start, end", [
+    ("2025-04-10 06:00", "2025-04-12 06:00"),    # 窗口内单调，乱序在提前停止之后
+    ("2025-04-11 06:00", "2025-04-11 18:00"),    # 窗口跨过乱序位置
+    ("2025-04-10 06:00", None),
+])
+def test_unsorted_file_falls_back_to_full_read(tmp_path, geojson, raw_config, caplog, start, end):
+    times = pd.date_range("2025-04-10", periods=72, freq="h")
+    # 交换两段数据，使二分查找和提前停止都会漏掉行
+    shuffled = times[36:].append(times[:36])
+    district_files = write_archive(tmp_path, DISTRICTS, shuffled)
+
+    with caplog.at_level(logging.WARNING, logger="src.data_loader"):
+        window = load_wind_data(district_files, geojson, raw_config, start=start, end=end)
+
+    assert "not sorted by time" in caplog.text
+    full = load_wind_data(district_files, geojson, raw_config)
+    expected = select_time_range(full, parse_time_bound(start), parse_time_bound(end))
+    pd.testing.assert_frame_equal(normalized(window), normalized(expected))
+
+def test_date_only_end_covers_whole_day():
+    assert parse_time_bound("2025-04-12") == pd.Timestamp("2025-04-12")
+    end = parse_time_bound("2025-04-12", end_of_day=True)
+    assert pd.Timestamp("2025-04-12 23:00") < end < pd.Timestamp("2025-04-13")
+    assert parse_time_bound("2025-04-12 06:00", end_of_day=True) == pd.Timestamp("2025-04-12 06:00")
+    assert parse_time_bound("", end_of_day=True) is None
+
+def test_invalid_time_bound_raises_value_error():
+    with pytest.raises(ValueError):
+        parse_time_bound("notadate")
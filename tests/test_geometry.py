@@ -0,0 +1,28 @@
+"""区域质心计算的测试"""
+import numpy as np
+
+from src.geojson_processor import load_geojson, calculate_polygon_centroid, calculate_centroid, get_adcode_centroids
+import config.settings as config
+
+def test_polygon_centroid_independent_of_orientation():
+    ring = np.array([[0, 0], [4, 0], [4, 2], [0, 2], [0, 0]], dtype=float)
+    np.testing.assert_allclose(calculate_polygon_centroid(ring), [2, 1])
+    np.testing.assert_allclose(calculate_polygon_centroid(ring[::-1]), [2, 1])
+
+def test_polygon_centroid_of_l_shape():
+    ring = np.array([[0, 0], [2, 0], [2, 1], [1, 1], [1, 2], [0, 2], [0, 0]], dtype=float)
+    # 两个单位正方形加一个单位正方形：(0.5,0.5),(1.5,0.5),(0.5,1.5)的平均
+    np.testing.assert_allclose(calculate_polygon_centroid(ring), [5 / 6, 5 / 6])
+
+def test_multipolygon_centroid_is_area_weighted():
+    geometry = {"type": "MultiPolygon", "coordinates": [
+        [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        [[[10, 0], [13, 0], [13, 1], [10, 1], [10, 0]]]
+    ]}
+    np.testing.assert_allclose(calculate_centroid(geometry), [(0.5 + 3 * 11.5) / 4, 0.5])
+
+def test_beijing_centroids_inside_beijing():
+    centroids = np.array(list(get_adcode_centroids(load_geojson(config.GEOJSON_PATH)).values()))
+    assert len(centroids) == 16
+    assert np.all((centroids[:, 0] > 115.4) & (centroids[:, 0] < 117.6))
+    assert np.all((centroids[:, 1] > 39.4) & (centroids[:, 1] < 41.1))
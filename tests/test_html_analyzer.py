@@ -0,0 +1,58 @@
+"""HTML体积分析器的测试"""
+import pandas as pd
+import pytest
+
+from src.html_analyzer import HtmlSizeAnalyzer, analyze_html, COMPONENTS
+from src.geojson_processor import load_geojson, create_district_adcode_map, build_topology
+from src.fast_figure import write_fast_html
+import config.settings as config
+
+# 代替完整plotly.js的内联脚本（分析器按文件头的版本注释识别）
+PLOTLYJS_STUB = '<script type="text/javascript">/** plotly.js v2.0.0 */' + "var Plotly = {};" * 40 + '</script>'
+
+@pytest.fixture(scope="module")
+def html_bytes(tmp_path_factory):
+    """两个区域、6个时间点的小图形HTML，包含边界拓扑、滑块步骤和动画帧"""
+    geojson = load_geojson(config.GEOJSON_PATH)
+    adcodes = create_district_adcode_map(geojson)
+    selected = {adcodes["东城"], adcodes["西城"]}
+    geojson = dict(geojson, features=[f for f in geojson['features'] if f['properties'].get('adcode') in selected])
+    times = pd.date_range("2025-04-12", periods=6, freq="h")
+    df = pd.DataFrame([
+        (t, district, adcodes[district], 3.0 + i * 1.7)
+        for i, t in enumerate(times) for district in ("东城", "西城")
+    ], columns=['datetime', 'district', 'adcode', 'wind_speed'])
+
+    path = tmp_path_factory.mktemp("html") / "map.html"
+    topology = build_topology(geojson, config.VISUALIZATION_SETTINGS["topology_quantization"])
+    write_fast_html(df, geojson, config, path, topology, workers=1, include_plotlyjs=False)
+    html = path.read_bytes()
+    # 插入内联的plotly.js脚本，覆盖脚本模式
+    return html.replace(b"<head>", b"<head>" + PLOTLYJS_STUB.encode('utf-8'), 1)
+
+def analyze(data, chunk_size):
+    analyzer = HtmlSizeAnalyzer(min_fragment=64)
+    for start in range(0, len(data), chunk_size):
+        analyzer.feed(data[start:start + chunk_size])
+    return analyzer.close()
+
+def test_components_add_up_to_file_size(html_bytes):
+    report = analyze(html_bytes, 4096)
+
+    assert report["total_bytes"] == len(html_bytes)
+    assert sum(report["components"].values()) == len(html_bytes)
+    assert list(report["components"]) == COMPONENTS
+    assert report["plotly_calls"] == ["Plotly.newPlot", "Plotly.addFrames"]
+    assert report["frames"]["count"] == 6
+    for name in ("plotlyjs", "topology", "frames", "slider_steps", "label_values", "layout", "html"):
+        assert report["components"][name] > 0, name
+    assert report["components"]["plotlyjs"] == len(PLOTLYJS_STUB) - len('<script type="text/javascript">') - len('</script>')
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 17])
+def test_report_independent_of_chunk_size(html_bytes, chunk_size):
+    assert analyze(html_bytes, chunk_size) == analyze(html_bytes, len(html_bytes))
+
+def test_analyze_html_reads_file(tmp_path, html_bytes):
+    path = tmp_path / "map.html"
+    path.write_bytes(html_bytes)
+    assert analyze_html(path, chunk_size=13, min_fragment=64) == analyze(html_bytes, 4096)
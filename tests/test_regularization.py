@@ -0,0 +1,156 @@
+"""时间轴规整和缺测填补的测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader import (
+    regularize_time_axis,
+    _fill_gaps,
+    QUALITY_OBSERVED,
+    QUALITY_INTERPOLATED,
+    QUALITY_FILLED,
+    QUALITY_MISSING,
+    QUALITY_SHIFTED
+)
+from src.geojson_processor import load_geojson, create_district_adcode_map
+from src.visualization import (
+    build_quality_notes,
+    build_wind_matrix,
+    create_wind_visualization,
+    LABEL_TEMPLATE,
+    MISSING_LABEL
+)
+from src.fast_figure import build_figure_dict, _canonical
+import config.settings as config
+
+O, I, F, M = QUALITY_OBSERVED, QUALITY_INTERPOLATED, QUALITY_FILLED, QUALITY_MISSING
+nan = np.nan
+
+def column(values):
+    return np.array(values, dtype=float)[:, None]
+
+def test_none_policy_marks_missing():
+    values, quality = _fill_gaps(column([1, nan, 3]), "none")
+    np.testing.assert_array_equal(values[:, 0], [1, nan, 3])
+    assert quality[:, 0].tolist() == [O, M, O]
+
+@pytest.mark.parametrize("max_gap, expected_values, expected_quality", [
+    (None, [nan, 1, 1.5, 2, 2.5, 3, 3, 3, nan], [M, O, I, I, I, O, O, O, M]),
+    (3, [nan, 1, 1.5, 2, 2.5, 3, 3, 3, nan], [M, O, I, I, I, O, O, O, M]),
+    (2, [nan, 1, nan, nan, nan, 3, 3, 3, nan], [M, O, M, M, M, O, O, O, M]),
+])
+def test_linear_fills_only_interior_gaps(max_gap, expected_values, expected_quality):
+    matrix = column([nan, 1, nan, nan, nan, 3, 3, 3, nan])
+    values, quality = _fill_gaps(matrix, "linear", max_gap)
+    np.testing.assert_allclose(values[:, 0], expected_values)
+    assert quality[:, 0].tolist() == expected_quality
+
+@pytest.mark.parametrize("max_gap, expected_values, expected_quality", [
+    (None, [nan, 1, 1, 1, 1, 3, 3], [M, O, F, F, F, O, F]),
+    (2, [nan, 1, 1, 1, nan, 3, 3], [M, O, F, F, M, O, F]),
+])
+def test_ffill_limits_fill_length(max_gap, expected_values, expected_quality):
+    matrix = column([nan, 1, nan, nan, nan, 3, nan])
+    values, quality = _fill_gaps(matrix, "ffill", max_gap)
+    np.testing.assert_allclose(values[:, 0], expected_values)
+    assert quality[:, 0].tolist() == expected_quality
+
+def test_fill_is_per_column():
+    matrix = np.array([[1, nan], [nan, 2], [3, nan], [nan, 4]])
+    values, quality = _fill_gaps(matrix, "linear")
+    np.testing.assert_allclose(values, [[1, nan], [2, 2], [3, 3], [nan, 4]])
+    np.testing.assert_array_equal(quality, [[O, M], [I, O], [O, I], [M, O]])
+
+def long_frame(rows):
+    return pd.DataFrame(rows, columns=['datetime', 'district', 'adcode', 'wind_speed']).assign(
+        datetime=lambda df: pd.to_datetime(df['datetime'])
+    )
+
+def test_regularize_builds_full_axis_and_marks_shifted():
+    df = long_frame([
+        ("2025-04-12 00:00", "a", 1, 1.0),
+        ("2025-04-12 01:10", "a", 1, 2.0),
+        ("2025-04-12 03:00", "a", 1, 4.0),
+        ("2025-04-12 00:00", "b", 2, 5.0),
+        ("2025-04-12 02:50", "b", 2, 6.0),
+        ("2025-04-12 03:00", "b", 2, 8.0),
+    ])
+    result = regularize_time_axis(df, "h", "linear", 3)
+
+    assert result['datetime'].drop_duplicates().tolist() == list(pd.date_range("2025-04-12", periods=4, freq="h"))
+    wide = result.pivot(index='datetime', columns='district', values='wind_speed')
+    quality = result.pivot(index='datetime', columns='district', values='quality')
+    np.testing.assert_allclose(wide['a'], [1, 2, 3, 4])
+    np.testing.assert_allclose(wide['b'], [5, 17 / 3, 19 / 3, 7])   # 02:50和03:00取整到同一时间点后取平均
+    assert quality['a'].tolist() == [O, QUALITY_SHIFTED, I, O]
+    assert quality['b'].tolist() == [O, I, I, QUALITY_SHIFTED]
+
+def test_regularize_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        regularize_time_axis(long_frame([("2025-04-12", "a", 1, 1.0)]), "h", "cubic")
+
+@pytest.fixture(scope="module")
+def gappy_df():
+    """两个区域的逐时数据：海淀在3-4时缺测（插值填补），东城在7-10时缺测（超过max_gap，不填补）"""
+    geojson = load_geojson(config.GEOJSON_PATH)
+    adcodes = create_district_adcode_map(geojson)
+    times = pd.date_range("2025-04-12", periods=12, freq="h")
+    rows = [
+        (t, district, adcodes[district], 2.0 + i)
+        for district in ("东城", "海淀") for i, t in enumerate(times)
+        if not (district == "海淀" and i in (3, 4)) and not (district == "东城" and 7 <= i <= 10)
+    ]
+    return geojson, regularize_time_axis(long_frame(rows), "h", "linear", 3)
+
+def test_quality_notes_are_scalar_without_fills(gappy_df):
+    _, df = gappy_df
+    unique_times = pd.DatetimeIndex(sorted(df['datetime'].unique()))
+    districts, _ = build_wind_matrix(df, unique_times)
+    notes = build_quality_notes(df, unique_times, districts)
+
+    assert [isinstance(row, str) for row in notes] == [True] * 3 + [False] * 2 + [True] * 7
+    assert all(row == "" for row in notes if isinstance(row, str))
+    assert "Interpolated" in "".join(notes[3])
+
+def test_quality_notes_in_figure(gappy_df):
+    geojson, df = gappy_df
+    figure = build_figure_dict(df, geojson, config)
+    expected = create_wind_visualization(df, geojson, config).to_plotly_json()
+
+    assert _canonical(figure['frames']) == _canonical(expected['frames'])
+    assert _canonical(figure['layout']['sliders']) == _canonical(expected['layout']['sliders'])
+    assert [isinstance(frame['data'][0]['text'], str) for frame in figure['frames']] == [True] * 3 + [False] * 2 + [True] * 7
+    steps = figure['layout']['sliders'][0]['steps']
+    assert steps[0]['args'][0]['text'][0] == ""
+    assert len(steps[3]['args'][0]['text'][0]) == 2
+    # 未填补的缺测（东城7-10时）在地图上标为No data
+    for i in (7, 8, 9, 10):
+        assert list(figure['frames'][i]['data'][-1]['texttemplate']) == ["No data", LABEL_TEMPLATE]
+        assert list(steps[i]['args'][0]['texttemplate'][-1]) == ["No data", LABEL_TEMPLATE]
+
+def test_no_quality_notes_without_fills(gappy_df):
+    _, df = gappy_df
+    complete = df.assign(quality=QUALITY_OBSERVED)
+    unique_times = pd.DatetimeIndex(sorted(complete['datetime'].unique()))
+    districts, _ = build_wind_matrix(complete, unique_times)
+    assert build_quality_notes(complete, unique_times, districts) is None
+
+def test_missing_values_have_no_label(gappy_df):
+    geojson, df = gappy_df
+    figure = build_figure_dict(df, geojson, config)
+    expected = create_wind_visualization(df, geojson, config).to_plotly_json()
+    assert _canonical(figure['frames']) == _canonical(expected['frames'])
+
+    # 东城（第一个区域）在7-10时没有数值：这些时间点的标签格式逐区域给出，缺失处不显示数值
+    missing = [7, 8, 9, 10]
+    assert np.isnan(df.loc[df['district'] == "东城", 'wind_speed'].to_numpy()[missing]).all()
+    assert figure['data'][-1]['texttemplate'] == LABEL_TEMPLATE
+    steps = figure['layout']['sliders'][0]['steps']
+    for i, frame in enumerate(figure['frames']):
+        frame_template = frame['data'][-1]['texttemplate']
+        step_template = steps[i]['args'][0]['texttemplate'][-1]
+        if i in missing:
+            assert list(frame_template) == [MISSING_LABEL, LABEL_TEMPLATE]
+            assert list(step_template) == [MISSING_LABEL, LABEL_TEMPLATE]
+        else:
+            assert frame_template == step_template == LABEL_TEMPLATE
@@ -0,0 +1,114 @@
+"""边界拓扑编码的测试"""
+import json
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from src.geojson_processor import (
+    load_geojson,
+    build_topology,
+    topology_to_geojson,
+    topology_to_mesh,
+    TOPOLOGY_DECODER_JS
+)
+import config.settings as config
+
+def square(x, y, size=1.0):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+def feature(adcode, coordinates, geometry_type="Polygon"):
+    return {
+        "type": "Feature",
+        "properties": {"adcode": adcode},
+        "geometry": {"type": geometry_type, "coordinates": coordinates}
+    }
+
+@pytest.fixture(scope="module")
+def beijing():
+    return load_geojson(config.GEOJSON_PATH)
+
+def _rings(geojson):
+    for f in geojson["features"]:
+        geometry = f["geometry"]
+        if geometry["type"] not in ("Polygon", "MultiPolygon"):
+            continue
+        polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        for polygon in polygons:
+            for ring in polygon:
+                yield np.asarray(ring, dtype=float)[:, :2]
+
+def _align(ring, reference):
+    """将闭合环旋转到与参考环相同的起点（拓扑编码会改变环的起点）"""
+    ring, reference = ring[:-1], reference[:-1]
+    offset = int(np.argmin(np.abs(ring - reference[0]).sum(axis=1)))
+    return np.roll(ring, -offset, axis=0), reference
+
+def test_shared_edge_is_stored_once():
+    geojson = {"type": "FeatureCollection", "features": [
+        feature(1, [square(0, 0)]),
+        feature(2, [square(1, 0)])
+    ]}
+    topology = build_topology(geojson, quantization=1e4)
+
+    # 两个正方形共8条边、其中1条公共边：切分后得到公共边和两条各自的外边
+    assert len(topology["arcs"]) == 3
+    first, second = (g["arcs"][0] for g in topology["objects"]["districts"]["geometries"])
+    shared = set(first) & {~ref for ref in second}
+    assert len(shared) == 1
+
+def test_isolated_rings_and_multipolygons_round_trip():
+    geojson = {"type": "FeatureCollection", "features": [
+        feature(1, [square(0, 0), square(0.25, 0.25, 0.5)[::-1]]),
+        feature(2, [[square(3, 0)], [square(5, 5)]], "MultiPolygon"),
+        feature(3, [4.0, 4.0], "Point")
+    ]}
+    topology = build_topology(geojson, quantization=1e4)
+    decoded = topology_to_geojson(topology)
+
+    assert [f["geometry"]["type"] for f in decoded["features"]] == ["Polygon", "MultiPolygon", "Point"]
+    assert [f["properties"] for f in decoded["features"]] == [f["properties"] for f in geojson["features"]]
+    for ring, original in zip(_rings(decoded), _rings(geojson)):
+        ring, original = _align(ring, original)
+        np.testing.assert_allclose(ring, original, atol=1e-3)
+
+def test_round_trip_within_quantization_error(beijing):
+    topology = build_topology(beijing, config.VISUALIZATION_SETTINGS["topology_quantization"])
+    decoded = topology_to_geojson(topology)
+    tolerance = np.array(topology["transform"]["scale"])
+
+    assert len(decoded["features"]) == len(beijing["features"])
+    for ring, original in zip(_rings(decoded), _rings(beijing)):
+        ring, original = _align(ring, original)
+        assert ring.shape == original.shape
+        assert (np.abs(ring - original) <= tolerance).all()
+
+def test_mesh_contains_every_arc_once(beijing):
+    topology = build_topology(beijing)
+    mesh = topology_to_mesh(topology)
+    lines = mesh["features"][0]["geometry"]["coordinates"]
+
+    assert len(lines) == len(topology["arcs"])
+    ring_points = sum(len(ring) for ring in _rings(beijing))
+    assert sum(len(line) for line in lines) < ring_points
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="需要Node.js运行浏览器端解码脚本")
+def test_javascript_decoder_matches_python(beijing):
+    topology = build_topology(beijing)
+    script = (
+        TOPOLOGY_DECODER_JS
+        + "var t = " + json.dumps(topology) + ";"
+        + "process.stdout.write(JSON.stringify([topologyFeatures(t, 'districts'), topologyMesh(t)]));"
+    )
+    output = subprocess.run(["node", "-e", script], capture_output=True, check=True, text=True).stdout
+    features, mesh = json.loads(output)
+
+    expected = topology_to_geojson(topology)
+    assert [f["properties"] for f in features["features"]] == [f["properties"] for f in expected["features"]]
+    for ring, reference in zip(_rings(features), _rings(expected)):
+        np.testing.assert_allclose(ring, reference, atol=1e-9)
+
+    expected_lines = topology_to_mesh(topology)["features"][0]["geometry"]["coordinates"]
+    for line, reference in zip(mesh["features"][0]["geometry"]["coordinates"], expected_lines):
+        np.testing.assert_allclose(line, reference, atol=1e-9)